@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata, trim_mean
+
+TRIM = 0.1
+
+
+def load_predictions(paths, out=None):
+	# one float32 column per file, rows aligned on the TransactionID order of the first file
+	# with out set the array is a .npy memmap, so only one prediction file is held in RAM at a time
+	first = pd.read_csv(paths[0], dtype={'isFraud': np.float32})
+	ids = first['TransactionID'].values
+	index = pd.Index(ids)
+	shape = (len(ids), len(paths))
+	if out is None:
+		preds = np.empty(shape, dtype=np.float32)
+	else:
+		preds = np.lib.format.open_memmap(out, mode='w+', dtype=np.float32, shape=shape)
+	for j, path in enumerate(paths):
+		frame = first if j == 0 else pd.read_csv(path, dtype={'isFraud': np.float32})
+		positions = index.get_indexer(frame['TransactionID'].values)
+		if len(positions) != len(ids) or (positions < 0).any():
+			raise ValueError(f'{path}: TransactionIDs do not match {paths[0]}')
+		preds[positions, j] = frame['isFraud'].values
+	return ids, preds
+
+def load_blend(path, ids, labels):
+	# training-side predictions (m1..mN columns) with labels aligned by TransactionID
+	blend = pd.read_csv(path)
+	positions = pd.Index(ids).get_indexer(blend['TransactionID'].values)
+	keep = positions >= 0
+	X = blend.drop(columns=['TransactionID']).values[keep].astype(np.float32)
+	return X, labels[positions[keep]]
+
+def mean(preds):
+	return preds.mean(axis=1)
+
+def reduce_preds(preds, how='mean', trim=TRIM):
+	# preds is (rows, models)
+	if how == 'mean':
+		return mean(preds)
+	if how == 'median':
+		return np.median(preds, axis=1)
+	if how == 'trimmed_mean':
+		return trim_mean(preds, trim, axis=1)
+	raise ValueError(f'unknown reduction: {how}')
+
+def rank_mean(preds):
+	ranks = np.zeros(preds.shape[0])
+	for j in range(preds.shape[1]):
+		ranks += rankdata(preds[:, j])
+	ranks /= preds.shape[1]
+	return ranks / ranks.max()
+
+def stack(model, X_train, y_train, preds):
+	model.fit(X_train, y_train)
+	return model.predict_proba(preds)[:,1]
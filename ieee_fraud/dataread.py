@@ -1,59 +1,399 @@
-
-import re
-import numpy as np
-import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-
-with open('categorical_cols.txt', 'r') as cat_raw:
-	dummy = [re.sub('\n', '', l).strip() for l in cat_raw]
-train_all = pd.read_csv("train_clean.csv", sep=",")
-train_all.drop(['TransactionID'], axis=1, inplace=True)
-train_cols = [el for el in list(train_all) if el != 'isFraud']
-dummy_indices = [i for i, col in enumerate(train_cols) if col in dummy]
-categories = [sorted(list(set(train_all[col].values))) for col in list(train_all) if col in dummy]
-
-
-def read_train(undersample=False, undersample_number=0):
-	if not undersample:
-		train = train_all
-	else:
-		train = pd.read_csv(f"train_clean_undersample{undersample_number}.csv", sep=",")
-		train.drop(['TransactionID'], axis=1, inplace=True)
-	train = train.reindex(np.random.permutation(train.index))
-
-	y_train = train['isFraud'].values
-	train.drop('isFraud', axis=1, inplace=True)
-	
-	ct = ColumnTransformer(
-		transformers=[(
-			'one_hot',
-			OneHotEncoder(sparse=True, categories=categories, handle_unknown='ignore'),
-			dummy_indices
-		)],
-		remainder='passthrough'
-	)
-	X_train = ct.fit_transform(train.values)
-	return X_train, y_train
-
-def read_test(undersample=False, undersample_number=0):
-	if not undersample:
-		train = train_all
-	else:
-		train = pd.read_csv(f"train_clean_undersample{undersample_number}.csv", sep=",")
-		train.drop(['TransactionID'], axis=1, inplace=True)
-	test = pd.read_csv("test_clean.csv", sep=",")
-
-	trans_id = test['TransactionID'].values
-	test.drop(['TransactionID'], axis=1, inplace=True)
-
-	ct = ColumnTransformer(
-		transformers=[(
-			'one_hot',
-			OneHotEncoder(sparse=True, categories=categories, handle_unknown='ignore'),
-			dummy_indices
-		)],
-		remainder='passthrough'
-	)
-	X_test = ct.fit_transform(test.values)
-	return X_test, trans_id
+
+import os
+import re
+import json
+import shutil
+import hashlib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import joblib
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.base import BaseEstimator, TransformerMixin
+from instrument import stage
+from sklearn.preprocessing import OneHotEncoder
+
+CACHE_DIR = 'cache'
+CACHE_VERSION = 3
+ENCODER_SETTINGS = {'encoder': 'one_hot', 'handle_unknown': 'ignore', 'remainder': 'passthrough'}
+# (encoding, buckets per column, total buckets), 'hash' needs one of the bucket counts
+ENCODING = ('one_hot', None, None)
+# 'auto' prefers parquet, then feather, then csv
+DATA_FORMAT = 'auto'
+DATA_FORMATS = ('parquet', 'feather', 'csv')
+USE_CACHE = True
+# reduced column list written by ieee_fraud_prune.py, honoured while USE_PRUNING is set
+PRUNED_COLUMNS = 'pruned_cols.json'
+# opt-in with IEEE_FRAUD_PRUNING=1, models fitted on one layout cannot score the other
+USE_PRUNING = os.environ.get('IEEE_FRAUD_PRUNING') == '1'
+# binning settings baked into the saved lightgbm Dataset
+LGB_DATASET_PARAMS = {'max_bin': 255, 'min_data_in_bin': 3, 'max_cat_to_onehot': 4, 'feature_pre_filter': False, 'verbose': -1}
+# row indices into train_clean written by ieee_fraud_undersample.py
+UNDERSAMPLE_INDEX = 'train_clean_undersample{}.npy'
+# latest train_clean rows by TransactionID, left out of every undersample by ieee_fraud_undersample.py --holdout
+HOLDOUT_INDEX = 'train_clean_holdout.npy'
+# newly labelled rows in the train_clean layout, kept apart so the persisted encoder stays valid
+NEW_ROWS = 'train_new'
+
+
+def _source(name):
+	formats = DATA_FORMATS if DATA_FORMAT == 'auto' else (DATA_FORMAT, )
+	for fmt in formats:
+		path = f'{name}.{fmt}'
+		if os.path.exists(path):
+			return path
+	raise FileNotFoundError(f'no {name} data in formats: {formats}')
+
+def read_frame(name, columns=None, nrows=None):
+	path = _source(name)
+	if path.endswith('.csv'):
+		return pd.read_csv(path, sep=",", usecols=columns, nrows=nrows)
+	if nrows is None:
+		if path.endswith('.parquet'):
+			return pd.read_parquet(path, columns=columns)
+		return pd.read_feather(path, columns=columns)
+	# only the leading rows are decoded, not the whole file
+	import pyarrow as pa
+	if path.endswith('.parquet'):
+		import pyarrow.parquet as pq
+		batches, rows = [], 0
+		# batches stop at row group boundaries, so one may come back short
+		for batch in pq.ParquetFile(path).iter_batches(batch_size=nrows, columns=columns):
+			batches.append(batch)
+			rows += batch.num_rows
+			if rows >= nrows:
+				break
+		return pa.Table.from_batches(batches).slice(0, nrows).to_pandas()
+	import pyarrow.feather as feather
+	return feather.read_table(path, columns=columns, memory_map=True).slice(0, nrows).to_pandas()
+
+def read_header(name):
+	path = _source(name)
+	if path.endswith('.csv'):
+		return list(pd.read_csv(path, sep=",", nrows=0))
+	if path.endswith('.parquet'):
+		import pyarrow.parquet as pq
+		return pq.read_schema(path).names
+	import pyarrow as pa
+	return pa.ipc.open_file(path).schema.names
+
+def iter_frames(name, chunksize):
+	path = _source(name)
+	if path.endswith('.csv'):
+		yield from pd.read_csv(path, sep=",", chunksize=chunksize)
+	elif path.endswith('.parquet'):
+		import pyarrow.parquet as pq
+		for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+			yield batch.to_pandas()
+	else:
+		import pyarrow.feather as feather
+		table = feather.read_table(path, memory_map=True)
+		for offset in range(0, table.num_rows, chunksize):
+			yield table.slice(offset, chunksize).to_pandas()
+
+@lru_cache(maxsize=None)
+def _dummy():
+	with open('categorical_cols.txt', 'r') as cat_raw:
+		return tuple(re.sub('\n', '', l).strip() for l in cat_raw)
+
+@lru_cache(maxsize=None)
+def _train_all():
+	train_all = read_frame('train_clean')
+	train_ids = train_all['TransactionID'].values
+	train_all.drop(['TransactionID'], axis=1, inplace=True)
+	return train_all, train_ids
+
+@lru_cache(maxsize=None)
+def _pruning():
+	if not USE_PRUNING or not os.path.exists(PRUNED_COLUMNS):
+		return None
+	with open(PRUNED_COLUMNS, 'r') as f:
+		return json.load(f)
+
+@lru_cache(maxsize=None)
+def _columns():
+	# column order from the header, categorical_cols.txt and the pruning list, no data is read
+	header = read_header('train_clean')
+	train_cols = [el for el in header if el not in ('TransactionID', 'isFraud')]
+	pruning = _pruning()
+	if pruning is not None:
+		train_cols = [col for col in train_cols if col in pruning['passthrough'] or col in pruning['categories']]
+	dummy = _dummy()
+	return train_cols, [i for i, col in enumerate(train_cols) if col in dummy]
+
+def _vocabularies(train_cols, dummy_indices):
+	# one-hot vocabularies from every categorical value in train_clean, only needed to fit the encoder
+	cat_cols = [train_cols[i] for i in dummy_indices]
+	cat_frame = read_frame('train_clean', columns=cat_cols)
+	categories = [sorted(pd.unique(cat_frame[col].values)) for col in cat_cols]
+	pruning = _pruning()
+	if pruning is not None:
+		# categories left out encode as all zeros through handle_unknown='ignore'
+		categories = [[value for value in values if value in pruning['categories'][col]] for col, values in zip(cat_cols, categories)]
+	return categories
+
+def _fitted_layout():
+	# columns and vocabularies as stored in the fitted one-hot encoder
+	ct = load_encoder(ENCODING)
+	return ct.train_cols_, list(ct.transformers_[0][2]), list(ct.named_transformers_['one_hot'].categories_)
+
+def encoded_columns():
+	# (column, category) for every column of the one-hot matrix, category is None for passthrough columns
+	train_cols, dummy_indices, categories = _fitted_layout()
+	one_hot = [(train_cols[i], value) for i, values in zip(dummy_indices, categories) for value in values]
+	return one_hot + [(col, None) for i, col in enumerate(train_cols) if i not in dummy_indices]
+
+
+def _file_hash(path):
+	# sha1 of file content, memoized in a sidecar keyed by size and mtime
+	stat = os.stat(path)
+	stamp = f'{stat.st_size} {stat.st_mtime_ns}'
+	sidecar = os.path.join(CACHE_DIR, f'{os.path.basename(path)}.sha1')
+	try:
+		with open(sidecar, 'r') as f:
+			cached_stamp, digest = f.read().rsplit(' ', 1)
+		if cached_stamp == stamp:
+			return digest
+	except (OSError, ValueError):
+		pass
+	h = hashlib.sha1()
+	with open(path, 'rb') as f:
+		for block in iter(lambda: f.read(1 << 20), b''):
+			h.update(block)
+	digest = h.hexdigest()
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	with open(sidecar, 'w') as f:
+		f.write(f'{stamp} {digest}')
+	return digest
+
+def _cache_path(name, source, ext='csr', extra='', spec=ENCODING):
+	key = hashlib.sha1()
+	key.update(f'v{CACHE_VERSION}'.encode())
+	key.update(_file_hash(source).encode())
+	key.update(os.path.basename(_encoder_path(spec)).encode())
+	key.update(extra.encode())
+	return os.path.join(CACHE_DIR, f'{name}_{key.hexdigest()[:16]}.{ext}')
+
+def publish(path, X, labels, ids):
+	# CSR arrays, labels and ids as plain .npy files that any process can memory-map
+	X = sparse.csr_matrix(X)
+	tmp = f'{path}.tmp{os.getpid()}'
+	os.makedirs(tmp, exist_ok=True)
+	arrays = {
+		'data': X.data, 'indices': X.indices, 'indptr': X.indptr,
+		'shape': np.array(X.shape), 'labels': labels, 'ids': ids
+	}
+	for key, values in arrays.items():
+		np.save(os.path.join(tmp, f'{key}.npy'), values, allow_pickle=False)
+	try:
+		os.replace(tmp, path)
+	except OSError:
+		# published concurrently by another process
+		shutil.rmtree(tmp)
+	return path
+
+def attach(path):
+	# read-only memory maps, workers attaching to the same path share one copy in the page cache
+	arrays = {
+		key: np.load(os.path.join(path, f'{key}.npy'), mmap_mode='r', allow_pickle=False)
+		for key in ['data', 'indices', 'indptr', 'labels', 'ids']
+	}
+	shape = tuple(np.load(os.path.join(path, 'shape.npy')))
+	X = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape, copy=False)
+	return X, arrays['labels'], arrays['ids']
+
+class HashingEncoder(BaseEstimator, TransformerMixin):
+	# one column per hash bucket, per categorical column or shared by all of them when total_buckets is set
+
+	def __init__(self, buckets=None, total_buckets=None):
+		self.buckets = buckets
+		self.total_buckets = total_buckets
+
+	def fit(self, X, y=None):
+		if not self.buckets and not self.total_buckets:
+			raise ValueError('hash encoding needs buckets or total_buckets')
+		self.n_columns_ = X.shape[1]
+		return self
+
+	def transform(self, X):
+		rows = np.arange(X.shape[0])
+		cols = []
+		for j in range(self.n_columns_):
+			hashed = pd.util.hash_array(X[:, j].astype(str), categorize=True)
+			if self.total_buckets:
+				salt = pd.util.hash_array(np.array([str(j)], dtype=object))[0]
+				cols.append((hashed ^ salt) % np.uint64(self.total_buckets))
+			else:
+				cols.append(hashed % np.uint64(self.buckets) + np.uint64(j*self.buckets))
+		width = self.total_buckets or self.buckets*self.n_columns_
+		X_hashed = sparse.csr_matrix(
+			(np.ones(len(rows)*len(cols)), (np.tile(rows, len(cols)), np.concatenate(cols).astype(np.int64))),
+			shape=(X.shape[0], width)
+		)
+		X_hashed.sum_duplicates()
+		return X_hashed
+
+def _encoder_path(spec=ENCODING):
+	key = hashlib.sha1()
+	key.update(f'v{CACHE_VERSION}'.encode())
+	key.update(_file_hash(_source('train_clean')).encode())
+	key.update('\n'.join(_dummy()).encode())
+	key.update(repr(sorted(ENCODER_SETTINGS.items())).encode())
+	if _pruning() is not None:
+		key.update(json.dumps(_pruning(), sort_keys=True).encode())
+	if spec != ENCODING:
+		key.update(repr(spec).encode())
+	return os.path.join(CACHE_DIR, f'encoder_{key.hexdigest()[:16]}.pkl')
+
+def _spec(encoding, buckets, total_buckets):
+	return ENCODING if encoding == 'one_hot' else (encoding, buckets, total_buckets)
+
+@lru_cache(maxsize=None)
+def load_encoder(spec=ENCODING):
+	# the pickled encoder carries its input columns (train_cols_), so transforming needs nothing else
+	path = _encoder_path(spec)
+	if os.path.exists(path):
+		return joblib.load(path)
+	train_cols, dummy_indices = _columns()
+	if spec[0] == 'hash':
+		categorical = ('hash', HashingEncoder(buckets=spec[1], total_buckets=spec[2]), dummy_indices)
+	else:
+		categorical = (
+			'one_hot',
+			OneHotEncoder(sparse=True, categories=_vocabularies(train_cols, dummy_indices), handle_unknown='ignore'),
+			dummy_indices
+		)
+	# always sparse, dense hashed blocks would otherwise turn the output into an object array
+	ct = ColumnTransformer(transformers=[categorical], remainder='passthrough', sparse_threshold=1.0)
+	# vocabularies come from the full train set, a sample is enough to fix the passthrough layout
+	sample = read_frame('train_clean', nrows=1000)
+	ct.fit(sample[train_cols].values)
+	ct.train_cols_ = train_cols
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	joblib.dump(ct, f'{path}.tmp')
+	os.replace(f'{path}.tmp', path)
+	return ct
+
+def encode(frame, spec=ENCODING):
+	encoder = load_encoder(spec)
+	# object dtype even when every column is numeric or missing, so vocabulary lookups see python values
+	values = np.asarray(frame[encoder.train_cols_].values, dtype=object)
+	return sparse.csr_matrix(encoder.transform(values))
+
+def encode_codes(frame):
+	# categorical columns as integer codes into the train vocabularies, unknown values become NaN
+	train_cols, dummy_indices, categories = _fitted_layout()
+	vocab = dict(zip(dummy_indices, categories))
+	X = np.empty((len(frame), len(train_cols)), dtype=np.float32)
+	for j, col in enumerate(train_cols):
+		if j in vocab:
+			codes = pd.Categorical(frame[col].values, categories=vocab[j]).codes.astype(np.float32)
+			codes[codes < 0] = np.nan
+			X[:, j] = codes
+		else:
+			X[:, j] = frame[col].values
+	return X
+
+def lgb_dataset_path(name='train_clean'):
+	# binned lightgbm Dataset with native categoricals, built once and saved as binary
+	import lightgbm as lgb
+	train_cols, dummy_indices = _columns()
+	path = _cache_path(f'{name}_lgb', _source(name), ext='bin', extra=repr(sorted(LGB_DATASET_PARAMS.items())))
+	if not os.path.exists(path):
+		frame = read_frame(name)
+		dataset = lgb.Dataset(
+			encode_codes(frame), label=frame['isFraud'].values,
+			feature_name=train_cols, categorical_feature=dummy_indices,
+			params=LGB_DATASET_PARAMS, free_raw_data=True
+		)
+		os.makedirs(CACHE_DIR, exist_ok=True)
+		dataset.save_binary(f'{path}.tmp')
+		os.replace(f'{path}.tmp', path)
+	return path
+
+def lgb_dataset(name='train_clean'):
+	import lightgbm as lgb
+	return lgb.Dataset(lgb_dataset_path(name), params=LGB_DATASET_PARAMS).construct()
+
+@lru_cache(maxsize=None)
+def read_train_full(spec=ENCODING):
+	return _encoded_train(False, 0, spec)
+
+def _undersample_indices(undersample, undersample_number):
+	# row indices into train_clean written by ieee_fraud_undersample.py, None for a full or legacy csv read
+	index_path = UNDERSAMPLE_INDEX.format(undersample_number)
+	if undersample and os.path.exists(index_path):
+		return np.load(index_path)
+	return None
+
+def _encoded_train(undersample, undersample_number, spec=ENCODING):
+	indices = _undersample_indices(undersample, undersample_number)
+	if indices is not None:
+		X_train, y_train, ids = read_train_full(spec)
+		return X_train[indices], y_train[indices], ids[indices]
+	name = f"train_clean_undersample{undersample_number}" if undersample else "train_clean"
+	path = _cache_path(name, _source(name), spec=spec)
+	if USE_CACHE and os.path.exists(path):
+		return attach(path)
+	with stage('read', source=name):
+		if not undersample:
+			train, ids = _train_all()
+		else:
+			train = read_frame(name)
+			ids = train['TransactionID'].values
+			train.drop(['TransactionID'], axis=1, inplace=True)
+	y_train = train['isFraud'].values
+	with stage('encode', source=name):
+		X_train = encode(train.drop('isFraud', axis=1), spec)
+	if USE_CACHE:
+		os.makedirs(CACHE_DIR, exist_ok=True)
+		return attach(publish(path, X_train, y_train, ids))
+	return X_train, y_train, ids
+
+def _encoded_test(spec=ENCODING):
+	path = _cache_path('test_clean', _source('test_clean'), spec=spec)
+	if USE_CACHE and os.path.exists(path):
+		return attach(path)[0::2]
+	with stage('read', source='test_clean'):
+		test = read_frame('test_clean')
+	trans_id = test['TransactionID'].values
+	test.drop(['TransactionID'], axis=1, inplace=True)
+	with stage('encode', source='test_clean'):
+		X_test = encode(test, spec)
+	if USE_CACHE:
+		os.makedirs(CACHE_DIR, exist_ok=True)
+		return attach(publish(path, X_test, np.empty(0), trans_id))[0::2]
+	return X_test, trans_id
+
+
+def encoder_key(spec=ENCODING):
+	# identifies the encoded column layout, saved next to every model fitted on it
+	return os.path.splitext(os.path.basename(_encoder_path(spec)))[0]
+
+def dataset_key(name='train_clean', spec=ENCODING):
+	# identifies a source file together with the encoder applied to it
+	return os.path.splitext(os.path.basename(_cache_path(name, _source(name), spec=spec)))[0]
+
+def read_train(undersample=False, undersample_number=0, shuffle=True, encoding='one_hot', buckets=None, total_buckets=None):
+	# shuffle=False returns the memory-mapped matrix itself, for sharing with parallel workers
+	spec = _spec(encoding, buckets, total_buckets)
+	indices = _undersample_indices(undersample, undersample_number)
+	if indices is not None and shuffle:
+		# shuffling the indices first copies the rows out of the full matrix only once
+		X_train, y_train, _ = read_train_full(spec)
+		indices = indices[np.random.permutation(len(indices))]
+		return X_train[indices], y_train[indices]
+	X_train, y_train, _ = _encoded_train(undersample, undersample_number, spec)
+	if not shuffle:
+		return X_train, y_train
+	perm = np.random.permutation(X_train.shape[0])
+	return X_train[perm], y_train[perm]
+
+def read_new(name=NEW_ROWS, encoding='one_hot', buckets=None, total_buckets=None):
+	# encoded with the encoder fitted on train_clean, categories it has not seen are ignored
+	frame = read_frame(name)
+	return encode(frame, _spec(encoding, buckets, total_buckets)), frame['isFraud'].values
+
+def read_test(undersample=False, undersample_number=0, encoding='one_hot', buckets=None, total_buckets=None):
+	return _encoded_test(_spec(encoding, buckets, total_buckets))
@@ -0,0 +1,44 @@
+import time
+import pickle
+import numpy as np
+from lightgbm import LGBMRegressor
+
+STUDENT_PARAMS = dict(
+	objective='cross_entropy', n_estimators=200, num_leaves=63,
+	learning_rate=0.1, min_child_samples=50, subsample=0.8, subsample_freq=1
+)
+
+
+class Student(LGBMRegressor):
+	# regressor on soft labels in [0, 1], scored like the classifiers it replaces
+
+	def predict_proba(self, X):
+		probs = self.predict(X)
+		return np.column_stack([1 - probs, probs])
+
+def soft_labels(models, X):
+	return np.mean([model.predict_proba(X)[:,1] for model in models], axis=0)
+
+def distill(models, X, n_jobs=-1, **params):
+	student = Student(n_jobs=n_jobs, **{**STUDENT_PARAMS, **params})
+	student.fit(X, soft_labels(models, X))
+	return student
+
+def latency(models, X, repeats=200, batch=10000):
+	# median single-row latency and batch throughput of the averaged models
+	single = []
+	for i in range(repeats):
+		row = X[i % X.shape[0]]
+		start = time.perf_counter()
+		soft_labels(models, row)
+		single.append(time.perf_counter() - start)
+	rows = X[:batch]
+	start = time.perf_counter()
+	soft_labels(models, rows)
+	return {
+		'single_row_ms': round(np.median(single) * 1000, 3),
+		'batch_rows_per_sec': round(rows.shape[0] / (time.perf_counter() - start), 1)
+	}
+
+def model_size(models):
+	return sum(len(pickle.dumps(model)) for model in models)
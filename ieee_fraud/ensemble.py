@@ -0,0 +1,79 @@
+import random
+import numpy as np
+import lightgbm
+from lightgbm import LGBMClassifier
+from dataread import UNDERSAMPLE_INDEX, read_train, lgb_dataset
+from scheduler import split_cores, run_tasks
+from search import booster_params
+from instrument import stage
+
+CORES_PER_MODEL = 2
+
+
+def random_params():
+	return dict(
+		n_estimators=100,
+		num_leaves=int(random.uniform(200, 400)),
+		boost_from_average=True,
+		is_unbalance=False,
+		learning_rate=0.1,
+		reg_alpha=random.uniform(0, 0.4),
+		reg_lambda=random.uniform(0, 0.4),
+		max_depth=-1,
+		min_data_in_leaf=int(random.uniform(10, 80)),
+		boosting_type=random.sample(['gbdt', 'dart'], 1)[0],
+		colsample_bytree=1, subsample=1,
+		subsample_for_bin=200000, objective='binary',
+		class_weight=None, min_split_gain=0.0,
+		min_child_weight=random.uniform(0.0005, 0.1),
+		subsample_freq=0, random_state=None,
+		silent=False, importance_type='split'
+	)
+
+class NativeMember:
+	# booster fitted on the native-categorical Dataset, scored on encode_codes rows instead of the one-hot matrix
+	native = True
+
+	def __init__(self, booster, params):
+		self.booster_ = booster
+		self.params = params
+
+	def get_params(self):
+		return dict(self.params)
+
+	def predict_proba(self, X):
+		probs = self.booster_.predict(X)
+		return np.column_stack([1 - probs, probs])
+
+def fit_native_member(params, undersample_number, n_jobs):
+	# the undersample is a row subset of the saved binned Dataset, so nothing is re-binned per member
+	indices = np.load(UNDERSAMPLE_INDEX.format(undersample_number))
+	with stage('read', member=undersample_number):
+		dataset = lgb_dataset().subset(indices)
+	with stage('fit', member=undersample_number, rows=len(indices)):
+		booster = lightgbm.train(
+			{**booster_params(LGBMClassifier(**params)), 'n_jobs': n_jobs},
+			dataset, num_boost_round=params['n_estimators']
+		)
+	return NativeMember(booster, params)
+
+def fit_member(params, undersample_number, n_jobs, native=False):
+	if native:
+		return fit_native_member(params, undersample_number, n_jobs)
+	with stage('read', member=undersample_number):
+		X_train, y_train = read_train(undersample=True, undersample_number=undersample_number)
+	with stage('fit', member=undersample_number, rows=X_train.shape[0]):
+		lgbm = LGBMClassifier(n_jobs=n_jobs, **params)
+		lgbm.fit(X_train, y_train)
+	return lgbm
+
+def train_serial(params_list):
+	return [fit_member(params, i, -1) for i, params in enumerate(params_list, start=1)]
+
+def train_parallel(params_list, cores_per_model=CORES_PER_MODEL, cores=None, native=False):
+	# several small models at once scale better than one model on all cores
+	outer, inner = split_cores(len(params_list), budget=cores, inner=cores_per_model)
+	args_list = [(params, i, inner, native) for i, params in enumerate(params_list, start=1)]
+	models, stats = run_tasks(fit_member, args_list, outer, inner, names=range(1, len(params_list)+1))
+	print(stats)
+	return models
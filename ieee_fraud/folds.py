@@ -0,0 +1,46 @@
+import os
+import numpy as np
+from dataread import CACHE_DIR, ENCODING, dataset_key, read_train_full, publish, attach
+
+FOLD_DIR = os.path.join(CACHE_DIR, 'folds')
+
+
+def time_folds(ids, folds, expanding=True):
+	# TransactionID follows TransactionDT, which preprocessing drops, so row order by id is time order
+	order = np.argsort(ids, kind='stable')
+	if expanding:
+		# forward chaining: fold k validates on block k+1 after training on every earlier block
+		blocks = np.array_split(order, folds+1)
+		return [(np.sort(np.concatenate(blocks[:k+1])), np.sort(blocks[k+1])) for k in range(folds)]
+	# contiguous blocks, every row is validated once, as out-of-fold stacking needs
+	blocks = np.array_split(order, folds)
+	return [(np.sort(np.concatenate(blocks[:k] + blocks[k+1:])), np.sort(blocks[k])) for k in range(folds)]
+
+def _fold_dir(folds, expanding, spec):
+	return os.path.join(FOLD_DIR, f"{dataset_key(spec=spec)}_{'expanding' if expanding else 'blocked'}{folds}")
+
+def fold_indices(folds=3, expanding=True, spec=ENCODING):
+	# int32 row indices into train_clean, computed once per dataset and fold scheme
+	path = os.path.join(_fold_dir(folds, expanding, spec), 'indices.npz')
+	if not os.path.exists(path):
+		_, _, ids = read_train_full(spec)
+		arrays = {}
+		for k, (train_idx, valid_idx) in enumerate(time_folds(np.asarray(ids), folds, expanding)):
+			arrays[f'train{k}'], arrays[f'valid{k}'] = train_idx.astype(np.int32), valid_idx.astype(np.int32)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		np.savez(f'{path}.tmp{os.getpid()}.npz', **arrays)
+		os.replace(f'{path}.tmp{os.getpid()}.npz', path)
+	with np.load(path) as cached:
+		return [(cached[f'train{k}'], cached[f'valid{k}']) for k in range(folds)]
+
+def fold_matrices(fold, folds=3, expanding=True, spec=ENCODING):
+	# train and validation CSR slices of one fold, published once and memory-mapped by every later fit
+	base = _fold_dir(folds, expanding, spec)
+	paths = [os.path.join(base, f'fold{fold}_{part}.csr') for part in ('train', 'valid')]
+	if not all(os.path.exists(path) for path in paths):
+		X, y, ids = read_train_full(spec)
+		for path, idx in zip(paths, fold_indices(folds, expanding, spec)[fold]):
+			if not os.path.exists(path):
+				publish(path, X[idx], y[idx], ids[idx])
+	(X_train, y_train, _), (X_valid, y_valid, _) = attach(paths[0]), attach(paths[1])
+	return X_train, y_train, X_valid, y_valid
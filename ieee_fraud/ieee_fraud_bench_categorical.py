@@ -0,0 +1,39 @@
+import sys
+import json
+import subprocess
+from dataread import read_train_full, lgb_dataset_path
+
+ROUNDS = 100
+BENCH = """
+import json, resource, time
+import lightgbm as lgb
+import dataread
+params = {{'objective': 'binary', 'num_leaves': 200, 'learning_rate': 0.1, 'verbose': -1}}
+start = time.time()
+if '{mode}' == 'one_hot':
+	X_train, y_train = dataread.read_train()
+	dataset = lgb.Dataset(X_train, y_train)
+else:
+	dataset = dataread.lgb_dataset()
+loaded = time.time()
+booster = lgb.train(params, dataset, num_boost_round={rounds})
+print(json.dumps({{
+	'mode': '{mode}',
+	'num_feature': booster.num_feature(),
+	'load_secs': round(loaded-start, 2),
+	'fit_secs': round(time.time()-loaded, 2),
+	'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1)
+}}))
+"""
+
+def bench(mode, rounds=ROUNDS):
+	out = subprocess.run([sys.executable, '-c', BENCH.format(mode=mode, rounds=rounds)], capture_output=True, check=True, text=True)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+	rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+	# warm both caches so only loading and fitting are timed
+	read_train_full()
+	lgb_dataset_path()
+	for mode in ['one_hot', 'native']:
+		print(bench(mode, rounds))
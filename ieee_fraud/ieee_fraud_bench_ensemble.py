@@ -0,0 +1,20 @@
+import sys
+import time
+from ensemble import random_params, train_serial, train_parallel
+
+MODELS = 8
+
+if __name__ == '__main__':
+	options = [int(el) for el in sys.argv[1:]] or [1, 2, 4]
+	params_list = [random_params() for _ in range(MODELS)]
+
+	start = time.time()
+	train_serial(params_list)
+	serial = time.time() - start
+	print(f'serial, n_jobs=-1: {round(serial, 2)} secs')
+
+	for cores_per_model in options:
+		start = time.time()
+		train_parallel(params_list, cores_per_model=cores_per_model)
+		elapsed = time.time() - start
+		print(f'parallel, {cores_per_model} cores per model: {round(elapsed, 2)} secs, speedup {round(serial/elapsed, 2)}x')
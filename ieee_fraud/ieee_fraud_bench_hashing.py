@@ -0,0 +1,37 @@
+import sys
+import time
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from lightgbm import LGBMClassifier
+from dataread import read_train
+
+SETTINGS = [
+	{'encoding': 'one_hot'},
+	{'encoding': 'hash', 'buckets': 16},
+	{'encoding': 'hash', 'buckets': 64},
+	{'encoding': 'hash', 'total_buckets': 1024},
+	{'encoding': 'hash', 'total_buckets': 4096}
+]
+
+if __name__ == '__main__':
+	rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+	report = []
+	for settings in SETTINGS:
+		start = time.time()
+		X, y = read_train(shuffle=False, **settings)
+		encoded = time.time()
+		X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=0.2, stratify=y, random_state=0)
+		lgbm = LGBMClassifier(n_estimators=rounds, num_leaves=200, learning_rate=0.1, objective='binary')
+		fit_start = time.time()
+		lgbm.fit(X_train, y_train)
+		fit_secs = time.time() - fit_start
+		report.append({
+			**settings, 'width': X.shape[1],
+			'read_secs': round(encoded-start, 2), 'fit_secs': round(fit_secs, 2),
+			'auc': round(roc_auc_score(y_valid, lgbm.predict_proba(X_valid)[:,1]), 5)
+		})
+		print(report[-1])
+	report = pd.DataFrame(report)
+	report.to_csv('hashing_report.csv', index=False)
+	print(report)
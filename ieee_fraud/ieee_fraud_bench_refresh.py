@@ -0,0 +1,51 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.metrics import roc_auc_score
+from lightgbm import LGBMClassifier
+from dataread import read_train_full
+from refresh import refresh, REFRESH_ROUNDS
+
+PARAMS = dict(n_estimators=100, num_leaves=200, learning_rate=0.1, objective='binary')
+# by TransactionID: old rows, then the newly labelled batch, then a later holdout
+NEW_SHARE = 0.1
+HOLDOUT_SHARE = 0.1
+
+
+def auc(model, X, y):
+	return round(roc_auc_score(y, model.predict_proba(X)[:,1]), 5)
+
+if __name__ == '__main__':
+	rounds = int(sys.argv[1]) if len(sys.argv) > 1 else REFRESH_ROUNDS
+	X, y, ids = read_train_full()
+	# the R merges reorder train_clean, so time order comes from sorting the ids as in folds.time_folds
+	order = np.argsort(ids, kind='stable')
+	rows = X.shape[0]
+	new_start, holdout_start = int(rows*(1-NEW_SHARE-HOLDOUT_SHARE)), int(rows*(1-HOLDOUT_SHARE))
+	old_idx, new_idx, holdout_idx = (np.sort(idx) for idx in np.split(order, [new_start, holdout_start]))
+	X_old, y_old = X[old_idx], y[old_idx]
+	X_new, y_new = X[new_idx], y[new_idx]
+	X_holdout, y_holdout = X[holdout_idx], y[holdout_idx]
+
+	start = time.time()
+	base = LGBMClassifier(**PARAMS).fit(X_old, y_old)
+	base_secs = time.time() - start
+	start = time.time()
+	refreshed = refresh(base, X_new, y_new, rounds=rounds)
+	refresh_secs = time.time() - start
+	start = time.time()
+	retrained = LGBMClassifier(**PARAMS).fit(sparse.vstack([X_old, X_new], format='csr'), np.concatenate([y_old, y_new]))
+	retrain_secs = time.time() - start
+
+	report = pd.DataFrame([
+		{'model': 'base', 'rows': X_old.shape[0], 'fit_secs': base_secs, 'auc': auc(base, X_holdout, y_holdout)},
+		{'model': 'refresh', 'rows': X_new.shape[0], 'fit_secs': refresh_secs, 'auc': auc(refreshed, X_holdout, y_holdout)},
+		{'model': 'retrain', 'rows': X_old.shape[0] + X_new.shape[0], 'fit_secs': retrain_secs, 'auc': auc(retrained, X_holdout, y_holdout)}
+	])
+	report['fit_secs'] = report['fit_secs'].round(2)
+	report['auc_drift'] = (report['auc'] - report['auc'].iloc[-1]).round(5)
+	report['speedup'] = (retrain_secs / report['fit_secs']).round(1)
+	report.to_csv('refresh_report.csv', index=False)
+	print(report)
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+
+SCALES = [10000, 50000, 200000]
+BENCH_DIR = 'bench'
+BASELINE = 'bench_baseline.csv'
+# slower than the baseline by more than this factor, and by more than MIN_DELTA secs, counts as a regression
+REGRESSION = 1.2
+MIN_DELTA = 0.1
+PARAMS = dict(n_estimators=50, num_leaves=64, learning_rate=0.1, objective='binary', random_state=0)
+
+
+def run_scale(rows, v_columns, threads):
+	# runs in a fresh process inside its own directory, so dataread caches and rss start cold
+	from lightgbm import LGBMClassifier
+	from synthetic import write_clean
+	from dataread import CACHE_DIR, read_train, read_test
+	from scoring import score_chunks
+	from instrument import stage, RECORDS
+	shutil.rmtree(CACHE_DIR, ignore_errors=True)
+	with stage('generate'):
+		write_clean(rows, v_columns=v_columns)
+	with stage('read_train'):
+		X_train, y_train = read_train(shuffle=False)
+	with stage('read_train_cached'):
+		read_train(shuffle=False)
+	with stage('read_test'):
+		read_test()
+	with stage('fit'):
+		lgbm = LGBMClassifier(n_jobs=threads, **PARAMS).fit(X_train, y_train)
+	score_chunks([lgbm], 'bench_submit.csv')
+	print(json.dumps(RECORDS, default=str))
+
+def bench(scales, v_columns, threads):
+	records = []
+	for rows in scales:
+		path = os.path.join(BENCH_DIR, str(rows))
+		os.makedirs(path, exist_ok=True)
+		out = subprocess.run(
+			[sys.executable, os.path.abspath(__file__), '--run', str(rows), '--v-columns', str(v_columns), '--threads', str(threads)],
+			cwd=path, capture_output=True, check=True, text=True
+		)
+		for record in json.loads(out.stdout.strip().splitlines()[-1]):
+			source = record.get('source') or record.get('out')
+			records.append({
+				'rows': rows, 'stage': record['stage'] if not source else f"{record['stage']}:{source}",
+				'wall_secs': record['wall_secs'], 'cpu_secs': record['cpu_secs'], 'peak_rss_mb': record.get('peak_rss_mb')
+			})
+		print(f'{rows} rows done')
+	return pd.DataFrame(records)
+
+def scaling(report):
+	# exponent of wall time against rows on a log-log scale, 1.0 is linear
+	exponents = {}
+	for name, group in report.groupby('stage'):
+		if len(group) > 1 and (group['wall_secs'] > 0).all():
+			exponents[name] = round(np.polyfit(np.log(group['rows']), np.log(group['wall_secs']), 1)[0], 2)
+	return pd.Series(exponents, name='scaling_exponent', dtype=float)
+
+def compare(report, baseline):
+	merged = report.merge(baseline, on=['rows', 'stage'], how='left', suffixes=('', '_baseline'))
+	merged['ratio'] = (merged['wall_secs'] / merged['wall_secs_baseline']).round(3)
+	merged['regression'] = (merged['ratio'] > REGRESSION) & (merged['wall_secs'] - merged['wall_secs_baseline'] > MIN_DELTA)
+	return merged
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('scales', nargs='*', type=int, default=SCALES)
+	parser.add_argument('--v-columns', type=int, default=339)
+	parser.add_argument('--threads', type=int, default=4)
+	parser.add_argument('--baseline', default=BASELINE)
+	parser.add_argument('--save-baseline', action='store_true')
+	parser.add_argument('--run', type=int, default=None)
+	args = parser.parse_args()
+	if args.run is not None:
+		run_scale(args.run, args.v_columns, args.threads)
+		sys.exit()
+
+	report = bench(args.scales, args.v_columns, args.threads)
+	if os.path.exists(args.baseline) and not args.save_baseline:
+		report = compare(report, pd.read_csv(args.baseline))
+	if args.save_baseline:
+		report.to_csv(args.baseline, index=False)
+	report.to_csv('bench_report.csv', index=False)
+	pd.set_option('display.width', 200)
+	pd.set_option('display.max_columns', None)
+	print(report)
+	print(scaling(report))
+	if 'regression' in report and report['regression'].any():
+		print(f"regressions: {sorted(set(report.loc[report['regression'], 'stage']))}")
@@ -0,0 +1,48 @@
+import os
+import json
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from dataread import UNDERSAMPLE_INDEX, HOLDOUT_INDEX, read_train_full
+from scoring import load_models, save_models
+from distill import distill, soft_labels, latency, model_size
+from instrument import stage, write_report
+
+DATASETS = 30
+MODELS = 'models/lgbm_under{}.pkl'
+STUDENT = 'models/lgbm_distilled{}.pkl'
+
+
+def holdout_rows():
+	# rows no teacher was fitted on, otherwise the ensemble auc is measured on its own training data
+	if not os.path.exists(HOLDOUT_INDEX):
+		raise FileNotFoundError(f'{HOLDOUT_INDEX} not found, run ieee_fraud_undersample.py --holdout and refit the members first')
+	holdout = np.load(HOLDOUT_INDEX)
+	for i in range(1, DATASETS+1):
+		if np.isin(np.load(UNDERSAMPLE_INDEX.format(i)), holdout).any():
+			raise ValueError(f'{UNDERSAMPLE_INDEX.format(i)} overlaps {HOLDOUT_INDEX}, redraw the undersamples with --holdout and refit the members')
+	return holdout
+
+if __name__ == '__main__':
+	valid_idx = holdout_rows()
+	teachers = load_models([MODELS.format(i) for i in range(1, DATASETS+1)])
+	X, y, _ = read_train_full()
+	train_idx = np.setdiff1d(np.arange(len(y)), valid_idx)
+
+	with stage('fit', member='student'):
+		student = distill(teachers, X[train_idx])
+	with stage('write', out=STUDENT):
+		save_models([student], STUDENT)
+
+	X_valid = X[valid_idx]
+	teacher_probs = soft_labels(teachers, X_valid)
+	student_probs = soft_labels([student], X_valid)
+	report = {
+		'ensemble': {'auc': roc_auc_score(y[valid_idx], teacher_probs), 'size_bytes': model_size(teachers), **latency(teachers, X_valid)},
+		'student': {'auc': roc_auc_score(y[valid_idx], student_probs), 'size_bytes': model_size([student]), **latency([student], X_valid)},
+		'correlation': float(np.corrcoef(teacher_probs, student_probs)[0, 1])
+	}
+	report['auc_change'] = report['student']['auc'] - report['ensemble']['auc']
+	print(json.dumps(report, indent=2))
+	with open('distill_report.json', 'w') as f:
+		json.dump(report, f, indent=2)
+	write_report('distill')
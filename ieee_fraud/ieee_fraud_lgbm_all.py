@@ -1,11 +1,16 @@
-import time
-import pandas as pd
-from dataread import read_train, read_test
+import sys
+from dataread import read_train, read_new
+from scoring import score_chunks, save_models, load_models
+from scheduler import split_cores
+from refresh import refresh
+from instrument import stage, write_report
 
 from lightgbm import LGBMClassifier
 
-if __name__ == '__main__':
-	start = time.time()
+MODEL = 'models/lgbm_all.pkl'
+
+
+def fit_full(n_jobs):
 	X_train, y_train = read_train()
 	lgbm = LGBMClassifier(
 		n_estimators=100,
@@ -21,18 +26,23 @@ if __name__ == '__main__':
 		subsample_for_bin=200000, objective='binary', 
 		class_weight=None, min_split_gain=0.0, 
 		min_child_weight=0.001, min_child_samples=20,
-		subsample_freq=0, random_state=None, n_jobs=-1, 
+		subsample_freq=0, random_state=None, n_jobs=n_jobs, 
 		silent=False, importance_type='split'
 	)
-	lgbm.fit(X_train, y_train)
-	print(f'fit done: {round(time.time()-start, 2)} secs from start')
+	with stage('fit', rows=X_train.shape[0]):
+		lgbm.fit(X_train, y_train)
+	return lgbm
 
-	X_test, trans_id = read_test()
-	lgbm_probs = ["{:.5f}".format(prob) for prob in lgbm.predict_proba(X_test)[:,1]]
-	print(f'scoring: {round(time.time()-start, 2)} secs from start')
+if __name__ == '__main__':
+	_, n_jobs = split_cores(1)
+	if '--refresh' in sys.argv:
+		with stage('read', source='train_new'):
+			X_new, y_new = read_new()
+		lgbm = refresh(load_models([MODEL])[0], X_new, y_new, n_jobs=n_jobs)
+	else:
+		lgbm = fit_full(n_jobs)
+	with stage('write', out=MODEL):
+		save_models([lgbm], MODEL)
 
-	lgbm_submit = pd.DataFrame({
-		'TransactionID': trans_id,
-		'isFraud': lgbm_probs
-	})
-	lgbm_submit.to_csv(f'lgbm_all_submit.csv', index=False, header=True)
+	score_chunks([lgbm], 'lgbm_all_submit.csv')
+	write_report('lgbm_all')
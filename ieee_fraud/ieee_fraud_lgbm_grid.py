@@ -1,14 +1,10 @@
-import time
-import pandas as pd
-from sklearn.model_selection import GridSearchCV
+import sys
 from lightgbm import LGBMClassifier
-from dataread import read_train
+from dataread import lgb_dataset_path
+from search import grid_search, successive_halving, native_grid
+from instrument import stage, write_report
 
 if __name__ == '__main__':
-	start = time.time()
-	X_train, y_train = read_train()
-	print(f'read and transformed: {round(time.time()-start, 2)} secs from start')
-	
 	lgb = LGBMClassifier(
 		learning_rate=0.1, class_weight=None, metric='auc',
 		num_leaves=200, n_estimators=200, max_depth=-1,
@@ -25,8 +21,12 @@ if __name__ == '__main__':
 		'reg_lambda': [0, 0.1]
 	}
 
-	lgb_search = GridSearchCV(lgb, param_grid, cv=3, scoring='roc_auc', verbose=10, n_jobs=-1)
-	lgb_search.fit(X_train, y_train)
-	res = pd.DataFrame.from_dict(lgb_search.cv_results_)
+	with stage('fit', member='grid'):
+		if '--native' in sys.argv:
+			res = native_grid(lgb, param_grid, lgb_dataset_path(), cv=3, time_ordered=True)
+		elif '--halving' in sys.argv:
+			res = successive_halving(lgb, param_grid, None, None, cv=3, time_ordered=True)
+		else:
+			res = grid_search(lgb, param_grid, cv=3)
 	res.to_csv('lightgbm_gridsearch.csv')
-	print(f'end: {round(time.time()-start, 2)} secs from start')
+	write_report('lgbm_grid')
@@ -1,55 +1,29 @@
-import time
-import pandas as pd
-from functools import reduce
+import sys
 
 from sklearn.linear_model import SGDClassifier
-from dataread import read_train, read_test
+from dataread import read_frame
+from combine import load_predictions, load_blend, mean, rank_mean, stack
+from submission import write_submission
+from instrument import stage, write_report
 
 DATASETS = 30
 
-if __name__ == '__main__':
-	start = time.time()
 
-	preds_all = []
-	for i in range(1, DATASETS+1):
-		preds = pd.read_csv(f'lgbm_under{i}.csv')
-		preds_all.append(preds)
-		print(f'{i}: data read: {round(time.time()-start, 2)} secs from start')
+if __name__ == '__main__':
+	# --stream keeps the prediction matrix in a memmap instead of RAM
+	out = 'lgbm_under_preds.npy' if '--stream' in sys.argv else None
+	with stage('read', source='lgbm_under'):
+		trans_id, preds = load_predictions([f'lgbm_under{i}.csv' for i in range(1, DATASETS+1)], out=out)
 
-	avg = reduce(lambda left, right: pd.merge(left, right, on='TransactionID'), preds_all)
-	avg['avg'] = avg.drop(columns=['TransactionID']).mean(axis=1)
-	avg = avg[['TransactionID','avg']]
-	avg.rename(columns={'avg': 'isFraud'}, inplace=True)
-	avg['isFraud'] = ["{:.5f}".format(el) for el in avg.isFraud.values]
-	avg.to_csv('lgbm_under_mean_submit.csv', index=False, header=True)
-	print(f'mean done: {round(time.time()-start, 2)} secs from start')
+	with stage('write', out='lgbm_under_mean_submit.csv'):
+		write_submission('lgbm_under_mean_submit.csv', trans_id, mean(preds))
 
-	for i, preds in enumerate(preds_all, start=1):
-		preds[f'rank{i}'] = preds['isFraud'].rank()
-		preds.drop(columns=['isFraud'], inplace=True)
-	ranks = reduce(lambda left, right: pd.merge(left, right, on='TransactionID'), preds_all)
-	ranks['avg_rank'] = ranks.drop(columns=['TransactionID']).mean(axis=1)
-	avg_rank = ranks[['TransactionID','avg_rank']]
-	avg_rank['avg_rank'] = avg_rank['avg_rank'] / avg_rank['avg_rank'].max()
-	avg_rank.rename(columns={'avg_rank': 'isFraud'}, inplace=True)
-	avg_rank['isFraud'] = ["{:.5f}".format(el) for el in avg_rank.isFraud.values]
-	avg_rank.to_csv('lgbm_under_avgrank_submit.csv', index=False, header=True)
-	print(f'meanrank done: {round(time.time()-start, 2)} secs from start')
+	with stage('write', out='lgbm_under_avgrank_submit.csv'):
+		write_submission('lgbm_under_avgrank_submit.csv', trans_id, rank_mean(preds))
 
-	train_all = pd.read_csv("train_clean.csv", sep=",")
-	train_all = train_all[['TransactionID', 'isFraud']]
-	train = pd.read_csv('lgbm_under_blend_data.csv')
-	train = pd.merge(train, train_all, on='TransactionID')
-	train.drop(['TransactionID'], axis=1, inplace=True)
-	for i, df in enumerate(preds_all, start=1):
-		df.rename(columns={'isFraud': f'm{i}'}, inplace=True)
-	test = reduce(lambda left, right: pd.merge(left, right, on='TransactionID'), preds_all)
-	trans_id = test['TransactionID'].values
-	test.drop(['TransactionID'], axis=1, inplace=True)
-	y_train = train['isFraud'].values
-	train.drop('isFraud', axis=1, inplace=True)
-	X_train = train.values
-	X_test = test.values
+	with stage('read', source='lgbm_under_blend_data'):
+		train_all = read_frame('train_clean', columns=['TransactionID', 'isFraud'])
+		X_train, y_train = load_blend('lgbm_under_blend_data.csv', train_all['TransactionID'].values, train_all['isFraud'].values)
 	sgd = SGDClassifier(
 		loss='log', penalty='l2', alpha=0.0001, 
 		l1_ratio=0.15, fit_intercept=True,
@@ -58,11 +32,8 @@ if __name__ == '__main__':
 		early_stopping=True, validation_fraction=0.1, n_iter_no_change=10, 
 		class_weight=None, warm_start=False, average=False
 	)
-	sgd.fit(X_train, y_train)
-	sgd_probs = ["{:.5f}".format(prob) for prob in sgd.predict_proba(X_test)[:,1]]
-	sgd_submit = pd.DataFrame({
-		'TransactionID': trans_id,
-		'isFraud': sgd_probs
-	})
-	sgd_submit.to_csv(f'lgbm_blend_submit.csv', index=False, header=True)
-	print(f'blend done: {round(time.time()-start, 2)} secs from start')
+	with stage('fit', member='blend'):
+		blended = stack(sgd, X_train, y_train, preds)
+	with stage('write', out='lgbm_blend_submit.csv'):
+		write_submission('lgbm_blend_submit.csv', trans_id, blended)
+	write_report('lgbm_under_combine')
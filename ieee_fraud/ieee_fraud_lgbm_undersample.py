@@ -1,64 +1,31 @@
-import time
-import random
-import pandas as pd
-from dataread import read_train, read_test
+import sys
+from scoring import score_ensemble, save_models, load_models
+from ensemble import random_params, train_parallel
+from refresh import refresh_parallel
+from dataread import read_new
+from instrument import stage, write_report
 
-from lightgbm import LGBMClassifier
+DATASETS = 30
+MODELS = 'models/lgbm_under{}.pkl'
 
 if __name__ == '__main__':
-	start = time.time()
+	if '--score-only' in sys.argv:
+		lgbm_models = load_models([MODELS.format(i) for i in range(1, DATASETS+1)])
+	elif '--refresh' in sys.argv:
+		# every member gets the same new rows, they are too few to undersample again
+		with stage('read', source='train_new'):
+			X_new, y_new = read_new()
+		lgbm_models = refresh_parallel(load_models([MODELS.format(i) for i in range(1, DATASETS+1)]), X_new, y_new)
+		with stage('write', out=MODELS):
+			save_models(lgbm_models, MODELS)
+	else:
+		# --native fits every member on a subset of the saved binned Dataset instead of the one-hot matrix
+		lgbm_models = train_parallel([random_params() for _ in range(DATASETS)], native='--native' in sys.argv)
+		with stage('write', out=MODELS):
+			save_models(lgbm_models, MODELS)
 
-	lgbm_models = []
-	for i in range(1, 31):
-		X_train, y_train = read_train(undersample=True, undersample_number=i)
-		leaves = int(random.uniform(200, 400))
-		regalpha = random.uniform(0, 0.4)
-		reglambda = random.uniform(0, 0.4)
-		child_weight = random.uniform(0.0005, 0.1)
-		min_data_in_leaf = int(random.uniform(10, 80))
-		boosting_type = random.sample(['gbdt', 'dart'], 1)[0]
-		lgbm = LGBMClassifier(
-			n_estimators=100,
-			num_leaves=leaves,
-			boost_from_average=True,
-			is_unbalance=False,
-			learning_rate=0.1,
-			reg_alpha=regalpha,
-			reg_lambda=reglambda,
-			max_depth=-1,
-			min_data_in_leaf=min_data_in_leaf,
-			boosting_type=boosting_type, 
-			colsample_bytree=1, subsample=1,
-			subsample_for_bin=200000, objective='binary', 
-			class_weight=None, min_split_gain=0.0, 
-			min_child_weight=child_weight,
-			subsample_freq=0, random_state=None, n_jobs=-1, 
-			silent=False, importance_type='split'
-		)
-		lgbm.fit(X_train, y_train)
-		lgbm_models.append(lgbm)
-		print(f'{i}: fit done: {round(time.time()-start, 2)} secs from start')
-
-	train_probs = {}
-	for i in range(1, 31):
-		lgbm = lgbm_models[i-1]
-		X_train, y_train = read_train()
-		train_probs[f'm{i}'] = lgbm.predict_proba(X_train)[:,1]
-		X_test, trans_id = read_test(undersample=True, undersample_number=i)
-		lgbm_probs = lgbm.predict_proba(X_test)[:,1]
-		lgbm_probs = ["{:.5f}".format(prob) for prob in lgbm_probs]
-		lgbm_submit = pd.DataFrame({
-			'TransactionID': trans_id,
-			'isFraud': lgbm_probs
-		})
-		lgbm_submit.to_csv(f'lgbm_under{i}.csv', index=False, header=True)
-		print(f'{i} scoring: {round(time.time()-start, 2)} secs from start')
-
-	try:
-		train = pd.read_csv("train_clean.csv", sep=",")
-		trans_id = train['TransactionID'].values
-		train_probs['TransactionID'] = trans_id
-	except:
-		pass
-	df_blend = pd.DataFrame(train_probs)
-	df_blend.to_csv(f'lgbm_under_blend_data.csv', index=False, header=True)
+	score_ensemble(
+		lgbm_models, [f'lgbm_under{i}.csv' for i in range(1, DATASETS+1)],
+		blend='lgbm_under_blend_data.csv'
+	)
+	write_report('lgbm_undersample')
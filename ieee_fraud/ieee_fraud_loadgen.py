@@ -0,0 +1,63 @@
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from dataread import read_frame
+
+
+async def request(reader, writer, method, path, payload=None):
+	body = json.dumps(payload).encode() if payload is not None else b''
+	writer.write(f'{method} {path} HTTP/1.1\r\nHost: local\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+	await writer.drain()
+	await reader.readline()
+	headers = {}
+	while True:
+		line = await reader.readline()
+		if line in (b'\r\n', b''):
+			break
+		key, value = line.decode().split(':', 1)
+		headers[key.strip().lower()] = value.strip()
+	return json.loads(await reader.readexactly(int(headers['content-length'])))
+
+async def connect(args):
+	if args.unix:
+		return await asyncio.open_unix_connection(args.unix)
+	return await asyncio.open_connection(args.host, args.port)
+
+async def client(args, rows, latencies):
+	reader, writer = await connect(args)
+	for _ in range(args.requests // args.concurrency):
+		row = rows[np.random.randint(len(rows))]
+		start = time.perf_counter()
+		await request(reader, writer, 'POST', '/score', row)
+		latencies.append(time.perf_counter() - start)
+	writer.close()
+
+async def main(args):
+	sample = read_frame('test_clean', nrows=args.sample).drop(columns=['TransactionID'])
+	rows = json.loads(sample.to_json(orient='records'))
+	latencies = []
+	start = time.time()
+	await asyncio.gather(*[client(args, rows, latencies) for _ in range(args.concurrency)])
+	elapsed = time.time() - start
+	latencies = np.array(latencies) * 1000
+	print(json.dumps({
+		'concurrency': args.concurrency, 'requests': len(latencies),
+		'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+		'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+		'requests_per_sec': round(len(latencies) / elapsed, 1)
+	}))
+	reader, writer = await connect(args)
+	print(json.dumps({'server': await request(reader, writer, 'GET', '/metrics')}))
+	writer.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8080)
+	parser.add_argument('--unix', default=None)
+	parser.add_argument('--concurrency', type=int, default=32)
+	parser.add_argument('--requests', type=int, default=10000)
+	parser.add_argument('--sample', type=int, default=1000)
+	asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+import sys
+import time
+import joblib
+import numpy as np
+from preprocess import read_transactions, preprocess, OnlineFeaturizer
+from instrument import stage, write_report
+
+STATE = 'preprocess_state.pkl'
+
+
+def write_outputs(train, test, categorical):
+	train.to_csv('train_clean.csv', index=False)
+	test.to_csv('test_clean.csv', index=False)
+	with open('categorical_cols.txt', 'w') as f:
+		f.write('\n'.join(categorical) + '\n')
+
+def online_bench(transactions, holdout):
+	# fit on all but the last rows, then featurize those one at a time from the running state
+	_, test, _, state = preprocess(transactions.iloc[:-holdout])
+	featurizer = OnlineFeaturizer(state, list(test.columns))
+	secs = []
+	for transaction in transactions.iloc[-holdout:].drop(columns=['isFraud']).to_dict('records'):
+		row_start = time.perf_counter()
+		featurizer.featurize(transaction)
+		secs.append(time.perf_counter() - row_start)
+	secs = np.array(secs) * 1000
+	print(f'online: {holdout} rows, p50 {np.percentile(secs, 50):.2f} ms, p99 {np.percentile(secs, 99):.2f} ms')
+
+if __name__ == '__main__':
+	with stage('read', source='raw'):
+		transactions = read_transactions()
+	if '--online' in sys.argv:
+		online_bench(transactions, int(sys.argv[sys.argv.index('--online')+1]))
+	else:
+		with stage('encode', member='features'):
+			train, test, categorical, state = preprocess(transactions)
+		with stage('write', out='train_clean.csv'):
+			write_outputs(train, test, categorical)
+			joblib.dump(state, STATE)
+	write_report('preprocess')
@@ -0,0 +1,63 @@
+import sys
+import json
+import subprocess
+import pandas as pd
+import dataread
+from scoring import load_models
+from pruning import importance, select, write_pruned, MIN_SPLITS
+from instrument import stage, write_report
+
+DATASETS = 30
+MODELS = 'models/lgbm_under{}.pkl'
+BENCH = """
+import json, time
+import dataread
+dataread.USE_PRUNING = {pruned}
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from lightgbm import LGBMClassifier
+X, y, _ = dataread.read_train_full()
+X_test, _ = dataread.read_test()
+X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=0.2, stratify=y, random_state=0)
+lgbm = LGBMClassifier(n_estimators=100, num_leaves=200, learning_rate=0.1, objective='binary', random_state=0)
+start = time.time()
+lgbm.fit(X_train, y_train)
+fit_secs = time.time() - start
+start = time.time()
+lgbm.predict_proba(X_test)
+score_secs = time.time() - start
+print(json.dumps({{
+	'layout': 'pruned' if {pruned} else 'full', 'width': X.shape[1], 'nnz': int(X.nnz),
+	'fit_secs': round(fit_secs, 2), 'score_secs': round(score_secs, 2),
+	'auc': round(roc_auc_score(y_valid, lgbm.predict_proba(X_valid)[:,1]), 5)
+}}))
+"""
+
+
+def bench(pruned):
+	# a fresh process per layout, so no encoder or matrix is shared between the two
+	out = subprocess.run([sys.executable, '-c', BENCH.format(pruned=pruned)], capture_output=True, check=True, text=True)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+	# importance is mapped through the layout the members were trained on, not an earlier pruned one
+	dataread.USE_PRUNING = False
+	min_splits = int(sys.argv[1]) if len(sys.argv) > 1 else MIN_SPLITS
+	models = load_models([MODELS.format(i) for i in range(1, DATASETS+1)])
+	with stage('fit', member='importance'):
+		frame = importance(models)
+	frame.to_csv('feature_importance.csv', index=False)
+	kept = select(frame, min_splits=min_splits)
+	with stage('write', out=dataread.PRUNED_COLUMNS):
+		write_pruned(kept)
+	print(f'kept {len(kept)} of {len(frame)} encoded columns, refit with IEEE_FRAUD_PRUNING=1 to use them')
+
+	report = pd.DataFrame([bench(False), bench(True)])
+	report['fit_speedup'] = (report['fit_secs'].iloc[0] / report['fit_secs']).round(2)
+	report['score_speedup'] = (report['score_secs'].iloc[0] / report['score_secs']).round(2)
+	report['auc_change'] = (report['auc'] - report['auc'].iloc[0]).round(5)
+	report.to_csv('prune_report.csv', index=False)
+	pd.set_option('display.width', 200)
+	pd.set_option('display.max_columns', None)
+	print(report)
+	write_report('prune')
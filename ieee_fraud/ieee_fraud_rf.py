@@ -1,14 +1,13 @@
-import time
-import statistics
-import pandas as pd
+import sys
 
 from sklearn.ensemble import RandomForestClassifier
-from dataread import read_train, read_test
+from dataread import read_train
+from scoring import score_chunks
+from scheduler import split_cores
+from instrument import stage, write_report
 
 if __name__ == '__main__':
-
-	start = time.time()
-
+	_, n_jobs = split_cores(1)
 	forests = []
 	for i in range(1, 16):
 		X_train, y_train = read_train(undersample=True, undersample_number=i)
@@ -19,28 +18,14 @@ if __name__ == '__main__':
 			min_samples_split=2, min_weight_fraction_leaf=0.0, 
 			max_leaf_nodes=None, min_impurity_decrease=0.0, 
 			min_impurity_split=None, bootstrap=False, 
-			oob_score=False, random_state=None, verbose=0, warm_start=False
+			oob_score=False, random_state=None, verbose=0, warm_start=False,
+			n_jobs=n_jobs
 		)
-		rf.fit(X_train, y_train)
+		with stage('fit', member=i, rows=X_train.shape[0]):
+			rf.fit(X_train, y_train)
 		forests.append(rf)
-		print(f'{i}: fit done: {round(time.time()-start, 2)} secs from start')
-
-	rf_probs_all = []
-	for i in range(1, 16):
-		rf = forests[i-1]
-		X_test, trans_id = read_test(undersample=True, undersample_number=i)
-		rf_probs_all.append(rf.predict_proba(X_test)[:,1])
-		print(f'{i} scoring: {round(time.time()-start, 2)} secs from start')
-
-	rf_probs = []
-	for index in range(len(rf_probs_all[0])):
-		entry = [el[index] for el in rf_probs_all]
-		rf_probs.append(statistics.mean(entry))
-
-	rf_probs = ["{:.5f}".format(prob) for prob in rf_probs]
-	rf_submit = pd.DataFrame({
-		'TransactionID': trans_id,
-		'isFraud': rf_probs
-	})
 
-	rf_submit.to_csv(f'rf_submit.csv', index=False, header=True)
\ No newline at end of file
+	# mean, median or trimmed_mean
+	reduce = sys.argv[1] if len(sys.argv) > 1 else 'mean'
+	score_chunks(forests, 'rf_submit.csv', reduce=reduce)
+	write_report('rf')
@@ -0,0 +1,18 @@
+import asyncio
+import argparse
+from scoring import load_models
+from serving import serve, MAX_BATCH, MAX_WAIT
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('models', nargs='+')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8080)
+	parser.add_argument('--unix', default=None)
+	parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+	parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT*1000)
+	args = parser.parse_args()
+	asyncio.run(serve(
+		load_models(args.models), host=args.host, port=args.port, unix=args.unix,
+		max_batch=args.max_batch, max_wait=args.max_wait_ms/1000
+	))
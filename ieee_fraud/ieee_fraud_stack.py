@@ -0,0 +1,28 @@
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from combine import stack
+from scoring import load_models
+from stacking import oof_predictions
+from submission import write_submission
+from instrument import stage, write_report
+
+DATASETS = 30
+MODELS = 'models/lgbm_under{}.pkl'
+
+if __name__ == '__main__':
+	members = [(model.get_params(), i) for i, model in enumerate(load_models([MODELS.format(i) for i in range(1, DATASETS+1)]), start=1)]
+	with stage('fit', member='oof'):
+		oof, y_train, test, trans_id = oof_predictions(members)
+
+	meta_learners = {
+		'sgd': SGDClassifier(
+			loss='log', penalty='l2', alpha=0.0001, max_iter=1000, tol=0.001,
+			early_stopping=True, validation_fraction=0.1, n_iter_no_change=10
+		),
+		'logistic': LogisticRegression(C=1.0, max_iter=1000)
+	}
+	for name, model in meta_learners.items():
+		with stage('fit', member=name):
+			probs = stack(model, oof, y_train, test)
+		with stage('write', out=f'lgbm_stack_{name}_submit.csv'):
+			write_submission(f'lgbm_stack_{name}_submit.csv', trans_id, probs)
+	write_report('stack')
@@ -0,0 +1,60 @@
+import sys
+import json
+import subprocess
+import numpy as np
+import pandas as pd
+from instrument import stage, write_report
+
+SOURCES = ['train_clean', 'test_clean']
+BENCH = """
+import json, resource, time
+import dataread
+dataread.DATA_FORMAT = '{fmt}'
+dataread.USE_CACHE = False
+start = time.time()
+X_train, y_train = dataread.read_train()
+print(json.dumps({{
+	'format': '{fmt}',
+	'load_secs': round(time.time()-start, 2),
+	'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1),
+	'shape': list(X_train.shape)
+}}))
+"""
+
+def downcast(frame):
+	# object columns (all of categorical_cols.txt except logicals) become dictionary encoded
+	for col in list(frame):
+		values = frame[col]
+		if values.dtype == object:
+			frame[col] = values.astype('category')
+		elif values.dtype == np.float64:
+			small = values.astype(np.float32)
+			if np.array_equal(small.values.astype(np.float64), values.values, equal_nan=True):
+				frame[col] = small
+		elif values.dtype == np.int64:
+			if values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max:
+				frame[col] = values.astype(np.int32)
+	return frame
+
+def convert(name, fmt='parquet'):
+	frame = downcast(pd.read_csv(f'{name}.csv', sep=","))
+	if fmt == 'parquet':
+		frame.to_parquet(f'{name}.{fmt}', index=False)
+	else:
+		frame.to_feather(f'{name}.{fmt}')
+	return frame
+
+def bench(fmt):
+	out = subprocess.run([sys.executable, '-c', BENCH.format(fmt=fmt)], capture_output=True, check=True, text=True)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+	fmt = sys.argv[1] if len(sys.argv) > 1 else 'parquet'
+	for name in SOURCES + sys.argv[2:]:
+		with stage('write', out=f'{name}.{fmt}') as record:
+			frame = convert(name, fmt)
+			record['frame_mb'] = round(frame.memory_usage(deep=True).sum()/2**20, 1)
+
+	for data_format in ['csv', fmt]:
+		print(bench(data_format))
+	write_report('to_parquet')
@@ -0,0 +1,52 @@
+import os
+import sys
+import numpy as np
+from dataread import UNDERSAMPLE_INDEX, HOLDOUT_INDEX, read_train_full
+from instrument import stage, write_report
+
+SAMPLES = 30
+FRAUD_SHARE = 0.8
+NON_FRAUD_RANGE = (20000, 40000)
+# share of the latest rows kept away from every member with --holdout
+HOLDOUT_SHARE = 0.1
+
+
+def time_holdout(ids, share=HOLDOUT_SHARE):
+	# train_clean is not in TransactionID order after the R merges, so the latest rows are found by sorting
+	order = np.argsort(ids, kind='stable')
+	return np.sort(order[len(ids) - int(np.ceil(len(ids)*share)):]).astype(np.int32)
+
+def draw_indices(y, rng, exclude=None):
+	# same scheme as ieee_fraud_undersample.R, as int32 row indices into train_clean
+	candidate = np.ones(len(y), dtype=bool)
+	if exclude is not None:
+		candidate[exclude] = False
+	fraud_indices = np.flatnonzero((y == 1) & candidate)
+	non_fraud_indices = np.flatnonzero((y == 0) & candidate)
+	fraud_choose = int(np.ceil(len(fraud_indices)*FRAUD_SHARE))
+	non_fraud_choose = int(np.ceil(rng.uniform(*NON_FRAUD_RANGE)))
+	indices = np.concatenate([
+		rng.choice(fraud_indices, fraud_choose, replace=False),
+		rng.choice(non_fraud_indices, non_fraud_choose, replace=False)
+	])
+	return np.sort(indices).astype(np.int32)
+
+def write_indices(y, samples=SAMPLES, seed=None, exclude=None):
+	rng = np.random.default_rng(seed)
+	for i in range(1, samples+1):
+		np.save(UNDERSAMPLE_INDEX.format(i), draw_indices(y, rng, exclude))
+
+if __name__ == '__main__':
+	args = [el for el in sys.argv[1:] if not el.startswith('--')]
+	seed = int(args[0]) if args else None
+	_, y_train, ids = read_train_full()
+	holdout = None
+	if '--holdout' in sys.argv:
+		holdout = time_holdout(ids)
+		np.save(HOLDOUT_INDEX, holdout)
+	elif os.path.exists(HOLDOUT_INDEX):
+		# a holdout from an earlier draw would overlap the new undersamples
+		os.remove(HOLDOUT_INDEX)
+	with stage('write', out=UNDERSAMPLE_INDEX.format('*'), samples=SAMPLES):
+		write_indices(y_train, seed=seed, exclude=holdout)
+	write_report('undersample')
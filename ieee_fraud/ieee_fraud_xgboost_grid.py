@@ -1,14 +1,9 @@
-import time
-import pandas as pd
-from sklearn.model_selection import GridSearchCV
+import sys
 from xgboost import XGBClassifier
-from dataread import read_train
+from search import grid_search, successive_halving
+from instrument import stage, write_report
 
 if __name__ == '__main__':
-	start = time.time()
-	X_train, y_train = read_train()
-	print(f'read and transformed: {round(time.time()-start, 2)} secs from start')
-
 	xgb = XGBClassifier(
 		booster='gbtree', learning_rate=0.1,
 		verbosity=1, objective='binary:logistic',
@@ -24,8 +19,10 @@ if __name__ == '__main__':
 		'reg_lambda': [0, 0.15, 0.3],
 		'max_depth': [10, 50]
 	}
-	xgb_search = GridSearchCV(xgb, param_grid, cv=3, scoring='roc_auc', verbose=10, n_jobs=4)
-	xgb_search.fit(X_train, y_train)
-	res = pd.DataFrame.from_dict(xgb_search.cv_results_)
+	with stage('fit', member='grid'):
+		if '--halving' in sys.argv:
+			res = successive_halving(xgb, param_grid, None, None, cv=3, time_ordered=True)
+		else:
+			res = grid_search(xgb, param_grid, cv=3)
 	res.to_csv('xgboost_gridsearch.csv')
-	print(f'end: {round(time.time()-start, 2)} secs from start')
+	write_report('xgboost_grid')
@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import time
+import resource
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import pandas as pd
+
+REPORT_DIR = 'reports'
+# appended by every run, so stage timings can be compared across runs
+HISTORY = os.path.join(REPORT_DIR, 'history.csv')
+RECORDS = []
+_STACK = []
+_RUN_START = time.time()
+
+
+def _reset_peak():
+	# linux resets VmHWM when 5 is written to clear_refs, elsewhere peaks stay process-wide
+	try:
+		with open('/proc/self/clear_refs', 'w') as f:
+			f.write('5')
+	except OSError:
+		pass
+
+def peak_rss_mb():
+	try:
+		with open('/proc/self/status') as f:
+			for line in f:
+				if line.startswith('VmHWM:'):
+					return round(int(line.split()[1]) / 1024, 1)
+	except OSError:
+		pass
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return round(peak / (2**20 if sys.platform == 'darwin' else 1024), 1)
+
+@contextmanager
+def stage(name, member=None, quiet=False, **tags):
+	# wall time, cpu time of all threads and peak rss of one pipeline stage
+	record = {'stage': name, 'member': member, 'pid': os.getpid(), 'start_time': round(time.time(), 3), **tags}
+	# the reset below would hide the enclosing stage's peak so far, it is kept in its record
+	if _STACK:
+		_STACK[-1]['peak_rss_mb'] = max(_STACK[-1].get('peak_rss_mb', 0), peak_rss_mb())
+	_reset_peak()
+	_STACK.append(record)
+	start, cpu_start = time.time(), time.process_time()
+	try:
+		yield record
+	finally:
+		record['wall_secs'] = round(time.time()-start, 3)
+		record['cpu_secs'] = round(time.process_time()-cpu_start, 3)
+		_STACK.pop()
+		record['peak_rss_mb'] = max(peak_rss_mb(), record.get('peak_rss_mb', 0))
+		if _STACK:
+			_STACK[-1]['peak_rss_mb'] = max(_STACK[-1].get('peak_rss_mb', 0), record['peak_rss_mb'])
+		RECORDS.append(record)
+		if not quiet:
+			label = name if member is None else f'{name} [{member}]'
+			print(f"{label}: {record['wall_secs']} secs, {record['cpu_secs']} cpu secs, peak rss {record['peak_rss_mb']} MB")
+
+def add_record(name, member=None, **values):
+	# for work measured elsewhere, e.g. interleaved per-model scoring
+	RECORDS.append({'stage': name, 'member': member, 'pid': os.getpid(), **values})
+
+def write_report(run):
+	# one json per run plus a row per stage appended to the shared history
+	os.makedirs(REPORT_DIR, exist_ok=True)
+	started = datetime.fromtimestamp(_RUN_START, timezone.utc)
+	report = {
+		'run': run, 'started': started.isoformat(), 'argv': sys.argv[1:],
+		'wall_secs': round(time.time()-_RUN_START, 3), 'stages': RECORDS
+	}
+	path = os.path.join(REPORT_DIR, f"{run}_{started.strftime('%Y%m%dT%H%M%S')}.json")
+	with open(path, 'w') as f:
+		json.dump(report, f, indent=1, default=str)
+	stages = pd.DataFrame(RECORDS)
+	stages.insert(0, 'started', report['started'])
+	stages.insert(0, 'run', run)
+	history = pd.concat([pd.read_csv(HISTORY), stages], sort=False) if os.path.exists(HISTORY) else stages
+	history.to_csv(HISTORY, index=False)
+	print(f"{run}: {report['wall_secs']} secs, report written to {path}")
+	return path
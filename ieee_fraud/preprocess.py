@@ -0,0 +1,277 @@
+import re
+import hashlib
+import numpy as np
+import pandas as pd
+
+ID_COLS = [f'id_{i}' for i in range(12, 39)]
+CAT_COLS_ALL = [f'card{i}' for i in range(1, 7)] + ['addr1', 'addr2'] + ID_COLS + [f'M{i}' for i in range(1, 10)]
+CARD_COLS = [f'card{i}' for i in range(1, 7)]
+DEVICE_COLS = ['id_30', 'id_31', 'id_32', 'id_33', 'DeviceType', 'DeviceInfo']
+START_DATE = pd.Timestamp('2017-12-01 00:00:00')
+RARE_ID_MISSING = 20
+RARE_DEVICE = 100
+PRUNE_UNIQUE = 100
+LOW_FRAUD = 0.02
+MISSING = -9999
+# later rules override earlier ones, as in ieee_fraud_preprocess.R
+DEVICE_RULES = [
+	('windows', 'windows'), ('sm', 'samsung'), ('rv:', 'RV'), ('lg', 'LG'), ('moto', 'motorola'),
+	('^vane|huawei', 'huawei'), ('^vgt', 'gt'), ('blade', 'blade'), ('nexus', 'nexus'), ('pixel', 'pixel'),
+	('iliu', 'ilium'), ('^vhi', 'hisense'), ('linux', 'linux'), ('^vxt', 'xt'), ('^vf', 'f'),
+	('^vhtc', 'htc'), ('redmi', 'redmi'), ('^v[0-9]{4}', 'some_numeric')
+]
+
+
+def _map_unique(values, fn):
+	# fn runs once per distinct value
+	codes, uniques = pd.factorize(values)
+	mapped = np.array([fn(el) for el in uniques], dtype=object)
+	return pd.Series(mapped[codes], index=values.index)
+
+def _r_number(value):
+	# R as.character for doubles: 15 significant digits, no trailing zeros
+	return f'{value:.15g}'
+
+def as_character(block):
+	# numeric columns as R as.character prints them, missing values stay missing
+	numbers = block.to_numpy(dtype=float)
+	missing = np.isnan(numbers)
+	filled = np.where(missing, 0, numbers)
+	if ((filled % 1) == 0).all() and (np.abs(filled) < 1e15).all():
+		text = filled.astype(np.int64).astype(str).astype(object)
+	else:
+		text = np.frompyfunc(_r_number, 1, 1)(filled)
+	text[missing] = np.nan
+	return pd.DataFrame(text, index=block.index, columns=block.columns)
+
+def paste(frame, cols):
+	# paste0 semantics: missing values become the string NA
+	values = frame[cols].fillna('NA').astype(str).to_numpy(dtype=object)
+	out = values[:, 0]
+	for j in range(1, values.shape[1]):
+		out = out + values[:, j]
+	return pd.Series(out, index=frame.index)
+
+def _fix_char(value):
+	value = value.strip() if isinstance(value, str) else ''
+	return 'V' + (value or 'unknown')
+
+def fix_chars(block):
+	return pd.DataFrame(np.frompyfunc(_fix_char, 1, 1)(block.to_numpy(dtype=object)), index=block.index, columns=block.columns)
+
+def missing_pattern(block):
+	# the is.na pattern as an integer whose order matches the sorted R pattern strings
+	bits = block.isna().to_numpy(dtype=np.int64)
+	return pd.Series(bits @ (1 << np.arange(bits.shape[1], dtype=np.int64)[::-1]), index=block.index)
+
+def group_key(values):
+	# compact 64 bit keys for the online store, stable across processes
+	return _map_unique(values, lambda el: int.from_bytes(hashlib.blake2b(el.encode(), digest_size=8).digest(), 'little'))
+
+
+def read_raw(kind, path='.'):
+	tran = pd.read_csv(f'{path}/{kind}_transaction.csv')
+	iden = pd.read_csv(f'{path}/{kind}_identity.csv')
+	# fread keeps empty strings as '' and only merge gaps become NA
+	for frame in (tran, iden):
+		strings = frame.select_dtypes(include=object).columns
+		frame[strings] = frame[strings].fillna('')
+	tran['isIdent'] = tran['TransactionID'].isin(iden['TransactionID'])
+	return iden.merge(tran, on='TransactionID', how='outer').sort_values('TransactionID')
+
+def read_transactions(path='.'):
+	transactions = pd.concat([read_raw('train', path), read_raw('test', path)], ignore_index=True, sort=False)
+	return transactions.sort_values('TransactionID', kind='stable').reset_index(drop=True)
+
+def row_features(transactions, strings=()):
+	# every feature that depends on the row alone; works the same for one row or the full history
+	df = transactions.copy()
+	for col in strings:
+		df[col] = df[col].astype(object)
+	converted = [col for col in CAT_COLS_ALL if col in df and df[col].dtype != object]
+	df[converted] = as_character(df[converted])
+	df['card_key'] = group_key(paste(df, CARD_COLS) + '|' + paste(df, DEVICE_COLS))
+	df['id_pattern'] = missing_pattern(df[[col for col in ID_COLS if col in df]])
+
+	strings = [col for col in df.select_dtypes(include=object).columns if col != 'card_key']
+	df[strings] = fix_chars(df[strings])
+
+	for side in ['P', 'R']:
+		domain = df[f'{side}_emaildomain'].replace('Vgmail', 'Vgmail.com')
+		df[f'{side}_emaildomain'] = domain
+		df[f'{side}_mail_host'] = _map_unique(domain, lambda el: el.split('.', 1)[0])
+		df[f'{side}_mail_extension'] = _map_unique(domain, lambda el: el.split('.', 1)[-1])
+
+	afterdot = _map_unique(df['TransactionAmt'], lambda el: _r_number(el).partition('.')[2])
+	df['afterdot_len'] = 'D' + afterdot.str.len().astype(str)
+	# whole amounts have afterdot set to '0' before cents are computed, as in the R script
+	cents = _map_unique(afterdot, lambda el: _r_number(round(float(f'0.{el or "0"}'), 2)))
+	df['cents'] = df['ProductCD'] + cents
+
+	date_time = START_DATE + pd.to_timedelta(df['TransactionDT'], unit='s')
+	df['wday'] = date_time.dt.day_name()
+	df['hour'] = date_time.dt.hour.astype(np.int64)
+	df.drop(columns=['TransactionDT'], inplace=True)
+
+	dist1, dist2 = df['dist1'].notna(), df['dist2'].notna()
+	df['dist_present'] = np.select([~dist1 & ~dist2, dist1 & ~dist2, ~dist1 & dist2], ['none', 'd1only', 'd2only'], 'both')
+	df['mail_match'] = df['P_mail_host'] == df['R_mail_host']
+	df['mail_ext_match'] = df['P_mail_extension'] == df['R_mail_extension']
+	df['wday_hour'] = df['wday'] + df['hour'].astype(str)
+	df['addr_all'] = df['addr1'] + df['addr2']
+	df['country_ext1'] = df['P_mail_extension'] + df['card3']
+	df['country_ext2'] = df['P_mail_extension'] + df['card5']
+	df['prod_card'] = df['ProductCD'] + df['card6']
+	return df
+
+def device_group(device_info, frequent):
+	device = device_info if device_info in frequent else 'other'
+	for pattern, name in DEVICE_RULES:
+		if re.search(pattern, device_info, flags=re.IGNORECASE):
+			device = name
+	return device
+
+
+class FeatureState:
+	# history-dependent features: fitted vocabularies plus running per-key counters
+
+	def fit(self, df):
+		labelled = df['isFraud'].notna()
+		patterns = pd.Series(pd.factorize(df['id_pattern'], sort=True)[0] + 1, index=df.index)
+		codes = 'V' + patterns.astype(str)
+		code_counts = codes.value_counts()
+		codes = codes.where(~codes.isin(code_counts.index[code_counts < RARE_ID_MISSING]), 'other')
+		self.id_missing = dict(zip(df['id_pattern'], codes))
+
+		cent_fraud = df[labelled].groupby('cents')['isFraud'].mean()
+		self.cents_other = set(cent_fraud.index[cent_fraud < LOW_FRAUD])
+		self.bin_median = df.groupby('card1')['TransactionAmt'].median().to_dict()
+		self.prodcd_median = df.groupby('ProductCD')['TransactionAmt'].median().to_dict()
+		self.fraud_counts = {}
+		self.prune_other = {}
+		return self
+
+	def fit_counts(self, df, cols):
+		self.counts = {col: df[col].value_counts().to_dict() for col in cols}
+		device_counts = df['DeviceInfo'].value_counts()
+		self.frequent_devices = set(device_counts.index[device_counts >= RARE_DEVICE])
+		return self
+
+	def fit_prune(self, df, cols):
+		labelled = df[df['isFraud'].notna()]
+		self.prune_other = {}
+		for col in cols:
+			counts = labelled.groupby(col)['isFraud'].agg(['size', 'mean'])
+			q1 = np.percentile(counts['size'], 25)
+			self.prune_other[col] = set(counts.index[(counts['size'] <= q1) & (counts['mean'] < LOW_FRAUD)])
+		return self
+
+
+def previous_fraud(df):
+	# cumulative frauds per card and device in TransactionID order, W products are unknown
+	frauds = df['isFraud'].fillna(0)
+	eligible = df['ProductCD'] != 'VW'
+	cumulative = frauds[eligible].groupby(df.loc[eligible, 'card_key']).cumsum()
+	out = pd.Series('Vunknown', index=df.index, dtype=object)
+	out[eligible] = np.where(cumulative - 1 > 0, 'VTRUE', 'VFALSE')
+	return out, frauds[eligible].groupby(df.loc[eligible, 'card_key']).sum().to_dict()
+
+def apply_state(df, state):
+	df['id_missing'] = 'V' + df['id_pattern'].map(state.id_missing).fillna('other')
+	df['cents'] = df['cents'].where(~df['cents'].isin(state.cents_other), 'other')
+	df['bin_median'] = df['card1'].map(state.bin_median)
+	df['bin_deviation'] = df['TransactionAmt'] - df['bin_median']
+	df['prodcd_median'] = df['ProductCD'].map(state.prodcd_median)
+	df['prodcd_deviation'] = df['TransactionAmt'] - df['prodcd_median']
+	return df
+
+def finish(df, state):
+	# impute, count features and device groups, in the order of the R script
+	numeric = [col for col in df.select_dtypes(include=np.floating).columns if col != 'isFraud']
+	df[numeric] = df[numeric].fillna(MISSING)
+	# built together, inserting the count columns one at a time fragments the frame
+	counts = pd.DataFrame({
+		f'{col}_count': df[col].map(counts).fillna(0).astype(np.int64)
+		for col, counts in state.counts.items()
+	}, index=df.index)
+	df = pd.concat([df, counts], axis=1)
+	devices = df['DeviceInfo'].unique()
+	groups = dict(zip(devices, [device_group(el, state.frequent_devices) for el in devices]))
+	df['device'] = df['DeviceInfo'].map(groups)
+	df.drop(columns=['DeviceInfo'], inplace=True)
+	return df
+
+
+def categorical_columns(df):
+	return [col for col in df if df[col].dtype in (object, bool) and col not in ('card_key', 'id_pattern')]
+
+def preprocess(transactions):
+	# batch port of ieee_fraud_preprocess.R: returns train, test, the categorical column list and the fitted state
+	df = row_features(transactions)
+	df['previous_fraud'], fraud_counts = previous_fraud(df)
+	state = FeatureState().fit(df)
+	state.raw_columns = list(transactions.columns)
+	state.strings = list(transactions.select_dtypes(include=object).columns)
+	state.fraud_counts = fraud_counts
+	df = apply_state(df, state)
+	categorical = categorical_columns(df)
+	character = [col for col in categorical if df[col].dtype == object]
+	state.fit_counts(df, character)
+	df = finish(df, state)
+	categorical = [col for col in categorical if col != 'DeviceInfo'] + ['device']
+	prune = [col for col in df if df[col].dtype == object and col not in ('card_key', 'id_pattern') and df[col].nunique() > PRUNE_UNIQUE]
+	state.fit_prune(df, prune)
+	for col, other in state.prune_other.items():
+		df[col] = df[col].where(~df[col].isin(other), 'other')
+	df.drop(columns=['card_key', 'id_pattern'], inplace=True)
+	train = df[df['isFraud'].notna()].copy()
+	train['isFraud'] = train['isFraud'].astype(np.int64)
+	test = df[df['isFraud'].isna()].drop(columns=['isFraud'])
+	return train, test, categorical, state
+
+
+class OnlineFeaturizer:
+	# featurizes one raw transaction in O(1) from the fitted state, without replaying history
+
+	def __init__(self, state, columns):
+		self.state = state
+		self.columns = columns
+
+	def _frame(self, transaction):
+		return pd.DataFrame([transaction]).reindex(columns=self.state.raw_columns)
+
+	def featurize(self, transaction, is_fraud=None):
+		# pass is_fraud when the label is already known, e.g. when replaying labelled rows
+		state = self.state
+		row = row_features(self._frame(transaction), state.strings).iloc[0].to_dict()
+		key = row.pop('card_key')
+		if row['ProductCD'] == 'VW':
+			row['previous_fraud'] = 'Vunknown'
+		else:
+			count = state.fraud_counts.get(key, 0) + (is_fraud or 0)
+			state.fraud_counts[key] = count
+			row['previous_fraud'] = 'VTRUE' if count - 1 > 0 else 'VFALSE'
+		row['id_missing'] = 'V' + state.id_missing.get(row.pop('id_pattern'), 'other')
+		if row['cents'] in state.cents_other:
+			row['cents'] = 'other'
+		row['bin_median'] = state.bin_median.get(row['card1'], np.nan)
+		row['bin_deviation'] = row['TransactionAmt'] - row['bin_median']
+		row['prodcd_median'] = state.prodcd_median.get(row['ProductCD'], np.nan)
+		row['prodcd_deviation'] = row['TransactionAmt'] - row['prodcd_median']
+		for col, value in row.items():
+			if isinstance(value, float) and np.isnan(value):
+				row[col] = MISSING
+		for col, counts in state.counts.items():
+			counts[row[col]] = counts.get(row[col], 0) + 1
+			row[f'{col}_count'] = counts[row[col]]
+		row['device'] = device_group(row.pop('DeviceInfo'), state.frequent_devices)
+		for col, other in state.prune_other.items():
+			if row[col] in other:
+				row[col] = 'other'
+		return {col: row[col] for col in self.columns}
+
+	def observe_label(self, transaction, is_fraud):
+		# a label arriving after scoring moves the running fraud count for its card and device
+		if is_fraud and transaction.get('ProductCD') != 'W':
+			key = row_features(self._frame(transaction), self.state.strings)['card_key'].iat[0]
+			self.state.fraud_counts[key] = self.state.fraud_counts.get(key, 0) + 1
@@ -0,0 +1,45 @@
+import json
+import numpy as np
+import pandas as pd
+from dataread import PRUNED_COLUMNS, encoded_columns
+
+MIN_SPLITS = 1
+
+
+def _plain(value):
+	# numpy scalars (e.g. bool categories) as json-friendly python values
+	return value.item() if isinstance(value, np.generic) else value
+
+def importance(models):
+	# split counts summed over members, gain as each member's share of its own total, averaged
+	columns = encoded_columns()
+	split = np.zeros(len(columns))
+	gain = np.zeros(len(columns))
+	for model in models:
+		booster = model.booster_
+		if booster.num_feature() != len(columns):
+			raise ValueError(f'model has {booster.num_feature()} features, the current layout encodes {len(columns)}')
+		split += booster.feature_importance('split')
+		member_gain = booster.feature_importance('gain')
+		if member_gain.sum() > 0:
+			gain += member_gain / member_gain.sum()
+	frame = pd.DataFrame(columns, columns=['column', 'category'])
+	frame['split'] = split.astype(np.int64)
+	frame['gain'] = gain / len(models)
+	return frame
+
+def select(frame, min_splits=MIN_SPLITS, gain_share=1.0):
+	# columns with at least min_splits splits that fall within the top gain_share of the total gain
+	ranked = frame.sort_values('gain', ascending=False)
+	covered = ranked['gain'].cumsum().shift(fill_value=0) / max(ranked['gain'].sum(), 1e-12)
+	keep = (ranked['split'] >= min_splits) & (covered < gain_share)
+	return frame.loc[keep[keep].index.sort_values()]
+
+def write_pruned(kept, path=PRUNED_COLUMNS):
+	passthrough = kept['category'].isna()
+	categories = {}
+	for column, category in zip(kept.loc[~passthrough, 'column'], kept.loc[~passthrough, 'category']):
+		categories.setdefault(column, []).append(_plain(category))
+	with open(path, 'w') as f:
+		json.dump({'passthrough': list(kept.loc[passthrough, 'column']), 'categories': categories}, f, indent=1)
+	return path
@@ -0,0 +1,25 @@
+from lightgbm import LGBMClassifier
+from scheduler import split_cores, run_tasks
+from ensemble import CORES_PER_MODEL
+from instrument import stage
+
+REFRESH_ROUNDS = 20
+
+
+def refresh(model, X_new, y_new, rounds=REFRESH_ROUNDS, n_jobs=-1):
+	# continues boosting from the fitted trees, only the new rows are binned and scanned
+	if getattr(model, 'native', False):
+		raise ValueError('native-categorical members are refit on the saved Dataset, refresh needs one-hot members')
+	params = model.get_params()
+	params.update(n_estimators=rounds, n_jobs=n_jobs)
+	with stage('refresh', rounds=rounds, rows=X_new.shape[0]):
+		refreshed = LGBMClassifier(**params)
+		refreshed.fit(X_new, y_new, init_model=model.booster_)
+	return refreshed
+
+def refresh_parallel(models, X_new, y_new, rounds=REFRESH_ROUNDS, cores_per_model=CORES_PER_MODEL, cores=None):
+	outer, inner = split_cores(len(models), budget=cores, inner=cores_per_model)
+	args_list = [(model, X_new, y_new, rounds, inner) for model in models]
+	refreshed, stats = run_tasks(refresh, args_list, outer, inner, names=range(1, len(models)+1))
+	print(stats)
+	return refreshed
@@ -0,0 +1,54 @@
+import os
+import pandas as pd
+from joblib import Parallel, delayed
+from instrument import RECORDS, stage
+
+# None uses every core this process may run on
+CORE_BUDGET = None
+
+
+def core_budget(budget=None):
+	budget = budget or CORE_BUDGET
+	if budget:
+		return budget
+	if hasattr(os, 'sched_getaffinity'):
+		return len(os.sched_getaffinity(0))
+	return os.cpu_count()
+
+def split_cores(tasks, budget=None, inner=None):
+	# outer workers x inner threads never exceeds the budget
+	budget = core_budget(budget)
+	if inner is None:
+		outer = max(1, min(tasks, budget))
+		inner = max(1, budget // outer)
+	else:
+		inner = max(1, min(inner, budget))
+		outer = max(1, min(tasks, budget // inner))
+	return outer, inner
+
+def _timed(fn, args, inner, name):
+	# stages recorded inside the worker travel back with the result
+	mark = len(RECORDS)
+	with stage('task', member=name, quiet=True, threads=inner) as record:
+		result = fn(*args)
+	records = RECORDS[mark:]
+	del RECORDS[mark:]
+	wall, cpu = record['wall_secs'], record['cpu_secs']
+	stats = {
+		'pid': os.getpid(), 'threads': inner,
+		'wall_secs': wall, 'cpu_secs': cpu,
+		'utilisation': round(cpu / (wall * inner), 3) if wall > 0 else 0.0,
+		'peak_rss_mb': record['peak_rss_mb']
+	}
+	return result, stats, records
+
+def run_tasks(fn, args_list, outer, inner, names=None):
+	# joblib memmaps large arrays for the workers, utilisation is cpu time / (wall time x inner threads)
+	names = list(names) if names is not None else list(range(len(args_list)))
+	out = Parallel(n_jobs=outer)(delayed(_timed)(fn, args, inner, name) for args, name in zip(args_list, names))
+	results = [result for result, _, _ in out]
+	for _, _, records in out:
+		RECORDS.extend(records)
+	stats = pd.DataFrame([stats for _, stats, _ in out], index=names)
+	print(f'{len(results)} tasks, {outer} workers x {inner} threads, mean utilisation {round(stats.utilisation.mean(), 3)}')
+	return results, stats
@@ -0,0 +1,103 @@
+import os
+import time
+from contextlib import ExitStack
+import joblib
+import numpy as np
+import pandas as pd
+from dataread import ENCODING, encode, encode_codes, encoder_key, iter_frames, read_frame, read_train_full
+from combine import reduce_preds
+from submission import HEADER, format_rows, open_submission
+from instrument import stage, add_record
+
+CHUNKSIZE = 50000
+
+
+def _features(models, frame):
+	# one-hot rows for sklearn members, integer codes for native-categorical ones, each built only when used
+	native = [getattr(model, 'native', False) for model in models]
+	X = encode(frame) if not all(native) else None
+	codes = encode_codes(frame) if any(native) else None
+	return [codes if flag else X for flag in native]
+
+def score_chunks(models, out, name='test_clean', chunksize=CHUNKSIZE, reduce='mean'):
+	# streams test rows through the fitted encoder, peak memory is bounded by chunksize
+	rows = 0
+	with stage('score', out=out) as record, open_submission(out) as f:
+		f.write(HEADER.encode())
+		for chunk in iter_frames(name, chunksize):
+			trans_id = chunk['TransactionID'].values
+			features = _features(models, chunk.drop(['TransactionID'], axis=1))
+			probs = reduce_preds(np.column_stack([model.predict_proba(X)[:,1] for model, X in zip(models, features)]), reduce)
+			f.write(format_rows(trans_id, probs))
+			rows += len(trans_id)
+		record['rows'] = rows
+	return rows
+
+def save_models(models, pattern, spec=ENCODING):
+	# the encoder key is written next to each model, load_models checks it against the current layout
+	paths = [pattern.format(i) for i in range(1, len(models)+1)]
+	os.makedirs(os.path.dirname(pattern) or '.', exist_ok=True)
+	key = encoder_key(spec)
+	for model, path in zip(models, paths):
+		joblib.dump(model, path)
+		with open(f'{path}.encoder', 'w') as f:
+			f.write(key)
+	return paths
+
+def load_models(paths, spec=ENCODING):
+	key = encoder_key(spec)
+	for path in paths:
+		# models saved before the key was recorded are loaded unchecked
+		if not os.path.exists(f'{path}.encoder'):
+			continue
+		with open(f'{path}.encoder', 'r') as f:
+			saved = f.read().strip()
+		if saved != key:
+			raise ValueError(
+				f'{path} was fitted on encoder {saved} but the current layout is {key}, '
+				'refit it or restore the train_clean and pruning setting (IEEE_FRAUD_PRUNING, pruned_cols.json) it was fitted with'
+			)
+	return [joblib.load(path) for path in paths]
+
+def score_ensemble(models, outs, blend=None, name='test_clean', chunksize=CHUNKSIZE):
+	# train and test are encoded once and shared by every model
+	secs = np.zeros(len(models))
+	cpu_secs = np.zeros(len(models))
+	rows = np.zeros(len(models), dtype=np.int64)
+
+	def predict(j, model, X):
+		start, cpu_start = time.time(), time.process_time()
+		probs = model.predict_proba(X)[:,1]
+		secs[j] += time.time() - start
+		cpu_secs[j] += time.process_time() - cpu_start
+		rows[j] += X.shape[0]
+		return probs
+
+	with stage('score', models=len(models)):
+		if blend is not None:
+			X_train, _, train_ids = read_train_full()
+			codes = None
+			if any(getattr(model, 'native', False) for model in models):
+				codes = encode_codes(read_frame('train_clean'))
+			train_probs = {
+				f'm{j+1}': predict(j, model, codes if getattr(model, 'native', False) else X_train)
+				for j, model in enumerate(models)
+			}
+			train_probs['TransactionID'] = train_ids
+			with stage('write', out=blend):
+				pd.DataFrame(train_probs).to_csv(blend, index=False, header=True)
+		with ExitStack() as stack:
+			files = [stack.enter_context(open_submission(out)) for out in outs]
+			for f in files:
+				f.write(HEADER.encode())
+			for chunk in iter_frames(name, chunksize):
+				trans_id = chunk['TransactionID'].values
+				features = _features(models, chunk.drop(['TransactionID'], axis=1))
+				for j, (model, f, X) in enumerate(zip(models, files, features)):
+					f.write(format_rows(trans_id, predict(j, model, X)))
+	# members are interleaved chunk by chunk, so their time is summed rather than staged
+	for j, out in enumerate(outs):
+		add_record('predict', member=out, wall_secs=round(secs[j], 3), cpu_secs=round(cpu_secs[j], 3), rows=int(rows[j]))
+	stats = pd.DataFrame({'out': outs, 'rows': rows, 'secs': secs.round(3), 'rows_per_sec': (rows / secs).round(1)})
+	print(stats)
+	return stats
@@ -0,0 +1,165 @@
+import math
+import time
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from scheduler import split_cores, run_tasks
+from dataread import LGB_DATASET_PARAMS
+from folds import fold_indices, fold_matrices
+
+EARLY_STOPPING_ROUNDS = 20
+# sklearn-only or Dataset construction settings, not passed to lgb.train
+NATIVE_DROP = ('n_estimators', 'class_weight', 'importance_type', 'silent', 'subsample_for_bin')
+
+
+def _fit_eval(estimator, X_train, y_train, X_valid, y_valid, early_stopping=True):
+	start = time.time()
+	if early_stopping:
+		estimator.fit(
+			X_train, y_train,
+			eval_set=[(X_valid, y_valid)], eval_metric='auc',
+			early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose=False
+		)
+	else:
+		estimator.fit(X_train, y_train)
+	fit_time = time.time() - start
+	start = time.time()
+	score = roc_auc_score(y_valid, estimator.predict_proba(X_valid)[:,1])
+	return fit_time, time.time() - start, score, _trained_rounds(estimator, early_stopping)
+
+def _trained_rounds(estimator, early_stopping):
+	# an early stopped fit ran EARLY_STOPPING_ROUNDS past its best round, the booster keeps only up to the best
+	rounds = estimator.get_params()['n_estimators']
+	best = getattr(estimator, 'best_iteration_', None)
+	if best is None and getattr(estimator, 'best_iteration', None) is not None:
+		# xgboost counts from 0
+		best = estimator.best_iteration + 1
+	if not early_stopping or not best:
+		return rounds
+	return min(rounds, best + EARLY_STOPPING_ROUNDS)
+
+def _fit_fold(estimator, X, y, train_idx, valid_idx):
+	return _fit_eval(estimator, X[train_idx], y[train_idx], X[valid_idx], y[valid_idx])
+
+def _fit_time_fold(estimator, fold, folds, early_stopping=True):
+	# the fold's slices are memory-mapped from the cache, nothing is sliced per fit
+	return _fit_eval(estimator, *fold_matrices(fold, folds), early_stopping)
+
+def _fit_native_fold(params, rounds, dataset_path, train_idx, valid_idx):
+	# each worker loads the binned Dataset and fits on row subsets, nothing is re-binned
+	import lightgbm as lgb
+	dataset = lgb.Dataset(dataset_path, params=LGB_DATASET_PARAMS).construct()
+	start = time.time()
+	booster = lgb.train(
+		params, dataset.subset(train_idx), num_boost_round=rounds,
+		valid_sets=[dataset.subset(valid_idx)],
+		callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)]
+	)
+	return time.time() - start, 0.0, booster.best_score['valid_0']['auc']
+
+def booster_params(estimator):
+	params = {key: value for key, value in estimator.get_params().items() if value is not None and key not in NATIVE_DROP}
+	params.update({'objective': 'binary', 'metric': 'auc', 'verbose': -1})
+	return params
+
+def _config_results(rung, fold_results):
+	# (rung, fit_times, score_times, scores) of one config as _cv_results reads it, trained rounds are dropped
+	return (rung, *zip(*[result[:3] for result in fold_results]))
+
+def _cv_results(configs, results, cv):
+	# same layout as GridSearchCV.cv_results_, configs are ranked by rung reached and then by score
+	rows = []
+	for i, params in enumerate(configs):
+		rung, fit_times, score_times, scores = results[i]
+		row = {
+			'mean_fit_time': np.mean(fit_times), 'std_fit_time': np.std(fit_times),
+			'mean_score_time': np.mean(score_times), 'std_score_time': np.std(score_times)
+		}
+		row.update({f'param_{key}': value for key, value in params.items()})
+		row['params'] = params
+		row.update({f'split{k}_test_score': score for k, score in enumerate(scores)})
+		row.update({'mean_test_score': np.mean(scores), 'std_test_score': np.std(scores), '_rung': rung})
+		rows.append(row)
+	res = pd.DataFrame(rows)
+	order = res.sort_values(['_rung', 'mean_test_score'], ascending=False).index
+	res.loc[order, 'rank_test_score'] = np.arange(1, len(res)+1)
+	res['rank_test_score'] = res['rank_test_score'].astype(int)
+	return res.drop(columns=['_rung'])
+
+def grid_search(estimator, param_grid, cv=3, cores=None):
+	# the fits GridSearchCV would make, every config x fold with all its rounds, as scheduled tasks
+	# on the cached expanding-window folds of train_clean, published once and memory-mapped by every task
+	configs = list(ParameterGrid(param_grid))
+	for fold in range(cv):
+		fold_matrices(fold, cv)
+	outer, inner = split_cores(len(configs)*cv, budget=cores)
+	args_list = [
+		(clone(estimator).set_params(n_jobs=inner, **config), fold, cv, False)
+		for config in configs for fold in range(cv)
+	]
+	fold_results, _ = run_tasks(_fit_time_fold, args_list, outer, inner)
+	results = {i: _config_results(0, fold_results[i*cv:(i+1)*cv]) for i in range(len(configs))}
+	return _cv_results(configs, results, cv)
+
+def successive_halving(estimator, param_grid, X, y, cv=3, min_rounds=25, max_rounds=None, eta=2, cores=None, time_ordered=False):
+	# every rung fits the surviving configs with eta times more boosting rounds and keeps the best 1/eta
+	# time_ordered uses the cached expanding-window folds of train_clean, X and y are then unused
+	start = time.time()
+	max_rounds = max_rounds or estimator.get_params()['n_estimators']
+	configs = list(ParameterGrid(param_grid))
+	if time_ordered:
+		fit, fold_args = _fit_time_fold, [(fold, cv) for fold in range(cv)]
+		for fold in range(cv):
+			fold_matrices(fold, cv)
+	else:
+		folds = StratifiedKFold(n_splits=cv, shuffle=True).split(np.zeros(len(y)), y)
+		fit, fold_args = _fit_fold, [(X, y, train_idx, valid_idx) for train_idx, valid_idx in folds]
+	alive = list(range(len(configs)))
+	results = {}
+	rounds, rung, trained_rounds = min(min_rounds, max_rounds), 0, 0
+	while True:
+		outer, inner = split_cores(len(alive)*cv, budget=cores)
+		args_list = [
+			(clone(estimator).set_params(n_estimators=rounds, n_jobs=inner, **configs[i]), *args)
+			for i in alive for args in fold_args
+		]
+		fold_results, _ = run_tasks(fit, args_list, outer, inner)
+		for k, i in enumerate(alive):
+			results[i] = _config_results(rung, fold_results[k*cv:(k+1)*cv])
+			print(f'rung {rung}, {rounds} rounds, {configs[i]}: auc {round(np.mean(results[i][3]), 5)}')
+		trained_rounds += sum(result[3] for result in fold_results)
+		if rounds >= max_rounds or len(alive) == 1:
+			break
+		alive = sorted(alive, key=lambda i: np.mean(results[i][3]), reverse=True)[:math.ceil(len(alive)/eta)]
+		rounds, rung = min(rounds*eta, max_rounds), rung + 1
+	# the full grid is not run: its time is extrapolated from the measured secs per round actually boosted
+	full_rounds = len(configs) * cv * max_rounds
+	elapsed = time.time() - start
+	estimate = elapsed / trained_rounds * full_rounds
+	print(
+		f'successive halving: {trained_rounds} of {full_rounds} grid rounds boosted in {round(elapsed, 2)} secs, '
+		f'full grid estimated (not measured) at ~{round(estimate, 2)} secs'
+	)
+	return _cv_results(configs, results, cv)
+
+def native_grid(estimator, param_grid, dataset_path, cv=3, cores=None, time_ordered=False):
+	# full grid over a persisted native-categorical Dataset, folds share its bins
+	import lightgbm as lgb
+	configs = list(ParameterGrid(param_grid))
+	if time_ordered:
+		# the Dataset rows are in train_clean order, so the cached indices apply as they are
+		folds = fold_indices(cv)
+	else:
+		y = lgb.Dataset(dataset_path, params=LGB_DATASET_PARAMS).construct().get_label()
+		folds = list(StratifiedKFold(n_splits=cv).split(np.zeros(len(y)), y))
+	outer, inner = split_cores(len(configs)*cv, budget=cores)
+	rounds = estimator.get_params()['n_estimators']
+	args_list = [
+		({**booster_params(estimator), **configs[i], 'n_jobs': inner}, rounds, dataset_path, train_idx, valid_idx)
+		for i in range(len(configs)) for train_idx, valid_idx in folds
+	]
+	fold_results, _ = run_tasks(_fit_native_fold, args_list, outer, inner)
+	results = {i: _config_results(0, fold_results[i*cv:(i+1)*cv]) for i in range(len(configs))}
+	return _cv_results(configs, results, cv)
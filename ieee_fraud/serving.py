@@ -0,0 +1,157 @@
+import json
+import time
+import asyncio
+from collections import deque
+import numpy as np
+import pandas as pd
+from dataread import read_header
+from scoring import _features
+
+MAX_BATCH = 256
+MAX_WAIT = 0.002
+LATENCY_WINDOW = 10000
+
+
+class MicroBatcher:
+	# concurrent requests wait up to max_wait for company, then are scored together in one predict_proba call
+
+	def __init__(self, models, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+		self.models = models
+		self.max_batch = max_batch
+		self.max_wait = max_wait
+		self.columns = [el for el in read_header('train_clean') if el not in ('TransactionID', 'isFraud')]
+		self.queue = asyncio.Queue()
+		self.latencies = deque(maxlen=LATENCY_WINDOW)
+		self.started = time.time()
+		self.requests = 0
+		self.rows = 0
+		self.batches = 0
+
+	def _predict(self, rows):
+		features = _features(self.models, pd.DataFrame(rows).reindex(columns=self.columns))
+		return np.mean([model.predict_proba(X)[:,1] for model, X in zip(self.models, features)], axis=0)
+
+	def _predict_each(self, items):
+		# fallback for a failed batch: requests scored one by one, so only the bad ones get their error
+		results = []
+		for rows, _ in items:
+			try:
+				results.append((self._predict(rows), None))
+			except Exception as e:
+				results.append((None, e))
+		return results
+
+	async def score(self, rows):
+		start = time.perf_counter()
+		future = asyncio.get_running_loop().create_future()
+		await self.queue.put((rows, future))
+		probs = await future
+		self.latencies.append(time.perf_counter() - start)
+		self.requests += 1
+		return probs
+
+	async def run(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			items = [await self.queue.get()]
+			size = len(items[0][0])
+			deadline = loop.time() + self.max_wait
+			while size < self.max_batch:
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					items.append(await asyncio.wait_for(self.queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+				size += len(items[-1][0])
+			rows = [row for batch, _ in items for row in batch]
+			try:
+				probs = await loop.run_in_executor(None, self._predict, rows)
+			except Exception:
+				results = await loop.run_in_executor(None, self._predict_each, items)
+				for (batch, future), (probs, error) in zip(items, results):
+					if error is None:
+						future.set_result(probs.tolist())
+						self.rows += len(batch)
+					else:
+						future.set_exception(error)
+				self.batches += len(items)
+				continue
+			offset = 0
+			for batch, future in items:
+				future.set_result(probs[offset:offset+len(batch)].tolist())
+				offset += len(batch)
+			self.batches += 1
+			self.rows += len(rows)
+
+	def metrics(self):
+		latencies = np.array(self.latencies) * 1000
+		uptime = time.time() - self.started
+		return {
+			'requests': self.requests, 'rows': self.rows, 'batches': self.batches,
+			'mean_batch_rows': round(self.rows / self.batches, 2) if self.batches else 0,
+			'p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+			'p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+			'requests_per_sec': round(self.requests / uptime, 1),
+			'rows_per_sec': round(self.rows / uptime, 1)
+		}
+
+async def read_request(reader):
+	# minimal HTTP/1.1: request line, headers, Content-Length body
+	line = await reader.readline()
+	if not line:
+		return None
+	method, path, _ = line.decode().split(' ', 2)
+	headers = {}
+	while True:
+		line = await reader.readline()
+		if line in (b'\r\n', b'\n', b''):
+			break
+		key, value = line.decode().split(':', 1)
+		headers[key.strip().lower()] = value.strip()
+	body = await reader.readexactly(int(headers.get('content-length', 0)))
+	return method, path, body
+
+def response(status, payload):
+	body = json.dumps(payload).encode()
+	head = f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n'
+	return head.encode() + body
+
+def handler(batcher):
+	async def handle(reader, writer):
+		try:
+			while True:
+				request = await read_request(reader)
+				if request is None:
+					break
+				method, path, body = request
+				if method == 'GET' and path == '/metrics':
+					writer.write(response('200 OK', batcher.metrics()))
+				elif method == 'POST' and path == '/score':
+					try:
+						rows = json.loads(body)
+						rows = rows if isinstance(rows, list) else [rows]
+						writer.write(response('200 OK', {'isFraud': await batcher.score(rows)}))
+					except Exception as e:
+						writer.write(response('400 Bad Request', {'error': str(e)}))
+				else:
+					writer.write(response('404 Not Found', {'error': path}))
+				await writer.drain()
+		except (ConnectionResetError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			writer.close()
+	return handle
+
+async def serve(models, host='127.0.0.1', port=8080, unix=None, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+	batcher = MicroBatcher(models, max_batch=max_batch, max_wait=max_wait)
+	# encoder and vocabularies are loaded before the first request
+	batcher._predict([{}])
+	if unix:
+		server = await asyncio.start_unix_server(handler(batcher), path=unix)
+	else:
+		server = await asyncio.start_server(handler(batcher), host=host, port=port)
+	print(f'serving on {unix or f"{host}:{port}"}, max batch {max_batch}, max wait {max_wait*1000} ms')
+	async with server:
+		await asyncio.gather(server.serve_forever(), batcher.run())
@@ -0,0 +1,69 @@
+import os
+import hashlib
+import numpy as np
+from lightgbm import LGBMClassifier
+from dataread import CACHE_DIR, UNDERSAMPLE_INDEX, _file_hash, dataset_key, read_train_full, read_test
+from folds import fold_indices, fold_matrices
+from scheduler import split_cores, run_tasks
+
+OOF_DIR = os.path.join(CACHE_DIR, 'oof')
+FOLDS = 5
+
+
+def member_key(params, undersample_number=None):
+	params = {key: value for key, value in params.items() if key != 'n_jobs'}
+	# redrawn undersample indices must not reuse predictions cached for the old draw
+	sample = None if undersample_number is None else (undersample_number, _file_hash(UNDERSAMPLE_INDEX.format(undersample_number)))
+	return hashlib.sha1(repr((sorted(params.items()), sample)).encode()).hexdigest()[:16]
+
+def _fold_path(key, fold, folds):
+	# t marks the time-blocked folds
+	return os.path.join(OOF_DIR, f'{dataset_key()}_{dataset_key("test_clean")}', f'{key}_{folds}t{fold}.npz')
+
+def _fit_fold(params, undersample_number, fold, folds, path, n_jobs):
+	# worker: fits on the fold's cached training slice (restricted to the member's undersample) and caches its predictions
+	X_train, y_train, X_valid, _ = fold_matrices(fold, folds, expanding=False)
+	if undersample_number is not None:
+		train_idx, _ = fold_indices(folds, expanding=False)[fold]
+		keep = np.flatnonzero(np.isin(train_idx, np.load(UNDERSAMPLE_INDEX.format(undersample_number))))
+		X_train, y_train = X_train[keep], y_train[keep]
+	params = {key: value for key, value in params.items() if key != 'n_jobs'}
+	model = LGBMClassifier(n_jobs=n_jobs, **params)
+	model.fit(X_train, y_train)
+	X_test, _ = read_test()
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	np.savez(
+		f'{path}.tmp.npz',
+		oof=model.predict_proba(X_valid)[:,1].astype(np.float32),
+		test=model.predict_proba(X_test)[:,1].astype(np.float32)
+	)
+	os.replace(f'{path}.tmp.npz', path)
+	return path
+
+def oof_predictions(members, folds=FOLDS, cores=None):
+	# members are (params, undersample number or None); only fold fits missing from the cache are run
+	_, y_train, _ = read_train_full()
+	_, trans_id = read_test()
+	blocks = fold_indices(folds, expanding=False)
+	keys = [member_key(params, number) for params, number in members]
+	missing = [
+		(params, number, fold, folds, _fold_path(key, fold, folds))
+		for (params, number), key in zip(members, keys)
+		for fold in range(folds)
+		if not os.path.exists(_fold_path(key, fold, folds))
+	]
+	if missing:
+		# slices are published before the workers start, so they only attach
+		for fold in range(folds):
+			fold_matrices(fold, folds, expanding=False)
+		outer, inner = split_cores(len(missing), budget=cores)
+		run_tasks(_fit_fold, [args + (inner, ) for args in missing], outer, inner)
+	oof = np.zeros((len(y_train), len(members)), dtype=np.float32)
+	test = np.zeros((len(trans_id), len(members)), dtype=np.float32)
+	for j, key in enumerate(keys):
+		for fold, (_, valid_idx) in enumerate(blocks):
+			with np.load(_fold_path(key, fold, folds)) as cached:
+				oof[valid_idx, j] = cached['oof']
+				test[:, j] += cached['test'] / folds
+	print(f'{len(members)} members x {folds} folds: {len(missing)} fits run, {len(members)*folds-len(missing)} from cache')
+	return oof, y_train, test, trans_id
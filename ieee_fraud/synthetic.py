@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# (name, cardinality) of the categorical columns ieee_fraud_preprocess.R writes
+CATEGORICAL = (
+	[('ProductCD', 5), ('card1', 500), ('card2', 300), ('card3', 60), ('card4', 5), ('card5', 60), ('card6', 5),
+	('addr1', 150), ('addr2', 30), ('P_emaildomain', 60), ('R_emaildomain', 60)] +
+	[(f'M{i}', 3) for i in range(1, 10)] +
+	[(f'id_{i}', 40 if i in (13, 14, 17, 19, 20, 30, 31, 33) else 4) for i in range(12, 39)] +
+	[('DeviceType', 3), ('isIdent', 2), ('P_mail_host', 30), ('P_mail_extension', 10), ('R_mail_host', 30),
+	('R_mail_extension', 10), ('afterdot_len', 5), ('cents', 200), ('wday', 7), ('dist_present', 4),
+	('mail_match', 2), ('mail_ext_match', 2), ('wday_hour', 168), ('addr_all', 200), ('country_ext1', 50),
+	('country_ext2', 50), ('prod_card', 20), ('previous_fraud', 3), ('id_missing', 60), ('device', 20)]
+)
+LOGICAL = ('isIdent', 'mail_match', 'mail_ext_match')
+NUMERIC = (
+	['TransactionAmt', 'dist1', 'dist2'] + [f'C{i}' for i in range(1, 15)] + [f'D{i}' for i in range(1, 16)] +
+	[f'id_{i:02d}' for i in range(1, 12)] + ['hour', 'bin_median', 'bin_deviation', 'prodcd_median', 'prodcd_deviation']
+)
+V_COLUMNS = 339
+MISSING_SHARE = 0.3
+FRAUD_SHARE = 0.035
+TEST_SHARE = 0.85
+
+
+def _categorical(name, cardinality, rows, rng):
+	# zipf-like frequencies, like the long tails of the real card and address columns
+	weights = 1 / np.arange(1, cardinality+1)
+	codes = rng.choice(cardinality, rows, p=weights/weights.sum())
+	if name in LOGICAL:
+		return codes == 1
+	return pd.Categorical.from_codes(codes, [f'V{k}' for k in range(cardinality)]).astype(object)
+
+def _numeric(rows, rng):
+	values = np.round(rng.lognormal(2, 1.5, rows), 2)
+	values[rng.random(rows) < MISSING_SHARE] = -9999
+	return values
+
+def make_frames(rows, seed=0, v_columns=V_COLUMNS):
+	# train and test in the train_clean/test_clean layout, fraud depends on a few columns so auc is meaningful
+	rng = np.random.default_rng(seed)
+	test_rows = int(rows*TEST_SHARE)
+	total = rows + test_rows
+	frame = {'TransactionID': np.arange(2987000, 2987000+total)}
+	for name, cardinality in CATEGORICAL:
+		frame[name] = _categorical(name, cardinality, total, rng)
+	for name in NUMERIC + [f'V{i}' for i in range(1, v_columns+1)]:
+		frame[name] = _numeric(total, rng)
+	for name, _ in CATEGORICAL:
+		if name not in LOGICAL:
+			frame[f'{name}_count'] = pd.Series(frame[name]).map(pd.Series(frame[name]).value_counts()).values
+	frame = pd.DataFrame(frame)
+	signal = (frame['card4'] == 'V1').values*1.5 + (frame['previous_fraud'] == 'V2').values*2 + np.log1p(frame['C1'].clip(0))*0.3
+	logit = np.log(FRAUD_SHARE/(1-FRAUD_SHARE)) + signal - signal.mean() + rng.normal(0, 1, total)
+	train = frame.iloc[:rows].copy()
+	train.insert(1, 'isFraud', (rng.random(rows) < 1/(1+np.exp(-logit[:rows]))).astype(np.int64))
+	return train, frame.iloc[rows:]
+
+def write_clean(rows, seed=0, v_columns=V_COLUMNS):
+	train, test = make_frames(rows, seed, v_columns)
+	train.to_csv('train_clean.csv', index=False)
+	test.to_csv('test_clean.csv', index=False)
+	with open('categorical_cols.txt', 'w') as f:
+		f.write('\n'.join(name for name, _ in CATEGORICAL) + '\n')
+	return train.shape, test.shape